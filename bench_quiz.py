@@ -0,0 +1,299 @@
+# bench_quiz.py
+# Headless benchmarks for the quiz engine (no display or Tk window needed).
+#
+#   python bench_quiz.py session [-n 200000] [--questions 10]
+#   python bench_quiz.py memory [--questions 1000000]
+#   python bench_quiz.py suite [--sizes 1k,100k,1m] [-o results.json] [--compare baseline.json]
+#   python bench_quiz.py compare baseline.json results.json [--threshold 0.25]
+#
+# `suite` times the app's data paths at each bank size on synthetic fixtures
+# (questions.json, a legacy leaderboard.csv and an export, generated once into
+# --data and reused): indexing the bank (load_questions_from_json), normalising
+# and sampling the largest category (start_for_selected), scoring a quiz over it
+# (submit_quiz), importing and ranking the leaderboard (show_leaderboard) and
+# writing the export (export_result). Nothing opens a window, so no display or
+# xvfb is needed. `compare` exits with status 1 when a case got slower than the
+# baseline by more than the threshold.
+import argparse, csv, gc, json, os, platform, random, sys, time, tracemalloc
+from datetime import datetime, timedelta
+
+from quiz1111 import (NormalizationCache, Question, QuestionSet, QuizQuestions, QuizSession, StringTable,
+                      load_questions_from_json, open_leaderboard, write_export)
+
+SIZES = {"1k": 1000, "100k": 100000, "1m": 1000000}
+SUITE_CATEGORIES = 10      # questions per category grow with the bank
+SUITE_DATA = "bench_data"
+COMPARE_THRESHOLD = 0.25   # fail when a case is more than 25% slower ...
+COMPARE_MIN_SECONDS = 0.002  # ... and slower by at least this much (timer noise)
+
+
+def make_questions(n, rng):
+    return [{"question": f"Question {i}?",
+             "options": [f"opt {i}.{j}" for j in range(4)],
+             "answer": f"opt {i}.0",
+             "image": ""} for i in range(n)]
+
+
+def bench_sessions(n_sessions, n_questions, seed=0):
+    # every simulated player goes the app's way: sample a shuffled view over
+    # the cached category (start_quiz), answer + next through it, submit.
+    # Timed twice: the engine alone over pre-sampled views, then with the
+    # seeded sampling each real start does.
+    rng = random.Random(seed)
+    base = QuestionSet((Question.from_raw(q) for q in make_questions(n_questions, rng)), StringTable())
+    # pre-drawn seeds and answer sheets so the loops measure the engine, not the RNG
+    seeds = [rng.randrange(1 << 32) for _ in range(64)]   # as new_seed()
+    views = [QuizQuestions.sample(base, seed=s) for s in seeds]
+    sheets = [[rng.choice(q["options"]) for q in view] for view in views]
+    sample = QuizQuestions.sample
+    session = QuizSession()
+    start, answer, advance, submit = session.start, session.answer, session.next, session.submit
+
+    def run(quiz):
+        total_score = 0
+        t0 = time.perf_counter()
+        for i in range(n_sessions):
+            start(quiz(i & 63))
+            for opt in sheets[i & 63]:
+                answer(opt)
+                advance()
+            total_score += submit()[0]
+        return time.perf_counter() - t0, total_score
+
+    engine, _ = run(views.__getitem__)
+    elapsed, total_score = run(lambda i: sample(base, seed=seeds[i]))
+    return {"sessions": n_sessions, "questions": n_questions, "seconds": elapsed,
+            "sessions_per_sec": n_sessions / elapsed, "engine_seconds": engine,
+            "engine_sessions_per_sec": n_sessions / engine, "mean_score": total_score / n_sessions}
+
+
+def make_bank_text(n, per_category, rng):
+    # JSON text per category, with the repetition a real bank has: True/False
+    # questions, a shared pool of answers, a handful of tags
+    pool = [f"answer {i}" for i in range(5000)]
+    tags = [f"tag{i}" for i in range(20)]
+    for c in range(0, n, per_category):
+        qs = []
+        for i in range(c, min(n, c + per_category)):
+            if rng.random() < 0.3:
+                opts = ["True", "False"]
+            else:
+                opts = rng.sample(pool, 3) + ["None of the above" if rng.random() < 0.5 else f"unique {i}"]
+            qs.append({"question": f"Question {i}: what is {rng.randrange(10**9)}?", "options": opts,
+                       "answer": opts[0], "image": f"img/{i}.png" if rng.random() < 0.1 else "",
+                       "tag": rng.choice(tags), "difficulty": rng.choice(["easy", "medium", "hard"])})
+        yield json.dumps({"category": f"Category {c // per_category}", "questions": qs})
+
+
+def bench_memory(n_questions, per_category=5000, seed=0):
+    # memory held by normalised categories: a tuple of Question per category
+    # versus the columnar QuestionSet over one shared string table
+    texts = list(make_bank_text(n_questions, per_category, random.Random(seed)))
+
+    def held(build):
+        gc.collect()
+        tracemalloc.start()
+        kept = [build(json.loads(t)["questions"]) for t in texts]
+        gc.collect()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del kept
+        return size
+
+    strings = StringTable()
+    tuples = held(lambda raw: tuple(Question.from_raw(q) for q in raw))
+    columns = held(lambda raw: QuestionSet((Question.from_raw(q) for q in raw), strings))
+    return {"questions": n_questions, "tuple_bytes": tuples, "columnar_bytes": columns,
+            "distinct_strings": len(strings)}
+
+
+# ---------- Suite ----------
+def make_fixtures(root, n, seed=0):
+    # questions.json, leaderboard.csv and exports/ for a bank of n questions
+    os.makedirs(os.path.join(root, "exports"), exist_ok=True)
+    rng = random.Random(seed)
+    per_category = max(n // SUITE_CATEGORIES, 1)
+    with open(os.path.join(root, "questions.json"), "w", encoding="utf-8") as f:
+        f.write("[\n")
+        for i, text in enumerate(make_bank_text(n, per_category, rng)):
+            f.write(",\n" * (i > 0) + text)
+        f.write("\n]\n")
+    # the legacy name,score,total,timestamp file the app imports on first use
+    t0 = datetime(2025, 1, 1)
+    with open(os.path.join(root, "leaderboard.csv"), "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        for i in range(n):
+            total = rng.randrange(5, 51)
+            w.writerow([f"player{rng.randrange(max(n // 20, 1))}", rng.randrange(total + 1), total,
+                        (t0 + timedelta(seconds=i * 37)).isoformat()])
+    bank = load_questions_from_json(os.path.join(root, "questions.json"))
+    view = QuizQuestions.sample(NormalizationCache().get(bank, 0), seed=seed)
+    write_export(os.path.join(root, "exports", "quiz_export_synthetic.csv"), view,
+                 [rng.choice(q["options"]) for q in view])
+
+
+def fixture_dir(data, size, seed=0):
+    root = os.path.join(data, f"{size}-seed{seed}")
+    if not os.path.isfile(os.path.join(root, "exports", "quiz_export_synthetic.csv")):
+        make_fixtures(root, SIZES[size], seed)
+    return root
+
+
+def best_of(repeat, run, setup=None):
+    # fastest of `repeat` runs; setup() (untimed) returns run's argument
+    best = float("inf")
+    for _ in range(repeat):
+        arg = setup() if setup is not None else None
+        t0 = time.perf_counter()
+        run(arg)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _remove_db(path):
+    for p in (path, path + "-wal", path + "-shm"):
+        if os.path.exists(p):
+            os.remove(p)
+
+
+def bench_suite(size, repeat=3, data=SUITE_DATA, seed=0):
+    # {case: {"seconds": best, "items": n}} for one bank size
+    root = fixture_dir(data, size, seed)
+    json_path = os.path.join(root, "questions.json")
+    results = {}
+
+    def case(name, items, seconds):
+        results[name] = {"seconds": seconds, "items": items}
+
+    bank = load_questions_from_json(json_path)
+    case("load_questions_from_json", sum(e.count for e in bank.entries),
+         best_of(repeat, lambda _: load_questions_from_json(json_path)))
+    base = NormalizationCache().get(bank, 0)
+    case("normalize_category", len(base),
+         best_of(repeat, lambda cache: QuizQuestions.sample(cache.get(bank, 0), seed=seed), NormalizationCache))
+
+    view = QuizQuestions.sample(base, seed=seed)
+    rng = random.Random(seed)
+    answers = [rng.choice(q["options"]) for q in view]
+
+    def score(session):
+        session.answers[:] = answers
+        session.submit()
+    case("score_quiz", len(view), best_of(repeat, score, lambda: QuizSession(view)))
+
+    db = os.path.join(root, "bench_leaderboard.db")
+    csv_path = os.path.join(root, "leaderboard.csv")
+
+    def fresh_db():
+        _remove_db(db)
+        return None
+    case("leaderboard_import", SIZES[size],
+         best_of(repeat, lambda _: open_leaderboard(db, csv_path).close(), fresh_db))
+    store = open_leaderboard(db, csv_path)
+    case("leaderboard_top", SIZES[size], best_of(repeat, lambda _: (store.categories(), store.top(),
+                                                                    store.for_player("player1"))))
+    store.close()
+    _remove_db(db)
+
+    out = os.path.join(root, "bench_export.csv")
+    case("export_result", len(view), best_of(repeat, lambda _: write_export(out, view, answers)))
+    os.remove(out)
+    return results
+
+
+def run_suite(sizes, repeat=3, data=SUITE_DATA, seed=0):
+    report = {"meta": {"python": platform.python_version(), "platform": platform.platform(),
+                       "machine": platform.machine(), "repeat": repeat, "seed": seed,
+                       "date": datetime.now().isoformat(timespec="seconds")},
+              "results": {}}
+    for size in sizes:
+        for name, r in bench_suite(size, repeat, data, seed).items():
+            report["results"][f"{size}/{name}"] = r
+            print(f"{size + '/' + name:<32} {r['seconds'] * 1000:10.2f} ms  ({r['items']} items)", flush=True)
+    return report
+
+
+def compare_reports(baseline, current, threshold=COMPARE_THRESHOLD, min_seconds=COMPARE_MIN_SECONDS):
+    # [(case, base s, current s, ratio, regressed)] for cases in both reports
+    rows = []
+    for name, b in baseline["results"].items():
+        c = current["results"].get(name)
+        if c is None:
+            continue
+        ratio = c["seconds"] / b["seconds"] if b["seconds"] else float("inf")
+        regressed = ratio > 1 + threshold and c["seconds"] - b["seconds"] > min_seconds
+        rows.append((name, b["seconds"], c["seconds"], ratio, regressed))
+    return rows
+
+
+def print_comparison(rows):
+    for name, b, c, ratio, regressed in rows:
+        print(f"{name:<32} {b * 1000:10.2f} -> {c * 1000:10.2f} ms  {ratio:6.2f}x"
+              + ("  REGRESSION" if regressed else ""))
+    failed = sum(r[4] for r in rows)
+    print(f"{failed} of {len(rows)} cases regressed" if failed else f"all {len(rows)} cases within threshold")
+    return failed
+
+
+def _load_report(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Quiz engine benchmarks")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("session", help="simulated QuizSession throughput on one core")
+    p.add_argument("-n", "--sessions", type=int, default=200000)
+    p.add_argument("--questions", type=int, default=10)
+    p.add_argument("--seed", type=int, default=0)
+    p = sub.add_parser("memory", help="memory of normalised questions, tuples vs columnar store")
+    p.add_argument("--questions", type=int, default=1000000)
+    p.add_argument("--seed", type=int, default=0)
+    p = sub.add_parser("suite", help="time the app's data paths on synthetic banks of each size")
+    p.add_argument("--sizes", default="1k,100k", help=f"comma-separated, from {', '.join(SIZES)} (default 1k,100k)")
+    p.add_argument("--repeat", type=int, default=3, help="runs per case; the fastest counts")
+    p.add_argument("--data", default=SUITE_DATA, help="where fixtures are generated and kept")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("-o", "--output", help="write the results as JSON (e.g. a new baseline)")
+    p.add_argument("--compare", metavar="BASELINE", help="then compare against this baseline")
+    p.add_argument("--threshold", type=float, default=COMPARE_THRESHOLD)
+    p = sub.add_parser("compare", help="compare two suite results; exit 1 on regressions")
+    p.add_argument("baseline")
+    p.add_argument("current")
+    p.add_argument("--threshold", type=float, default=COMPARE_THRESHOLD,
+                   help="allowed slowdown as a fraction (default %(default)s)")
+    args = parser.parse_args(argv)
+    if args.cmd == "session":
+        r = bench_sessions(args.sessions, args.questions, args.seed)
+        print(f"{r['sessions']} sessions x {r['questions']} questions in {r['seconds']:.2f}s "
+              f"-> {r['sessions_per_sec']:,.0f} sessions/s (mean score {r['mean_score']:.2f})")
+        print(f"  engine alone (pre-sampled quizzes): {r['engine_seconds']:.2f}s "
+              f"-> {r['engine_sessions_per_sec']:,.0f} sessions/s; "
+              f"seeded sampling {(r['seconds'] - r['engine_seconds']) / r['sessions'] * 1e6:.1f} us/session")
+    elif args.cmd == "memory":
+        r = bench_memory(args.questions, seed=args.seed)
+        n = r["questions"]
+        print(f"{n} questions: tuples {r['tuple_bytes'] / 1e6:.0f} MB ({r['tuple_bytes'] / n:.0f} B/question), "
+              f"columnar {r['columnar_bytes'] / 1e6:.0f} MB ({r['columnar_bytes'] / n:.0f} B/question), "
+              f"{1 - r['columnar_bytes'] / r['tuple_bytes']:.0%} less; {r['distinct_strings']} distinct strings")
+    elif args.cmd == "suite":
+        sizes = [s.strip().lower() for s in args.sizes.split(",") if s.strip()]
+        unknown = [s for s in sizes if s not in SIZES]
+        if unknown:
+            parser.error(f"unknown size(s) {', '.join(unknown)}; choose from {', '.join(SIZES)}")
+        report = run_suite(sizes, args.repeat, args.data, args.seed)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            print(f"Results written to {args.output}")
+        if args.compare and print_comparison(compare_reports(_load_report(args.compare), report, args.threshold)):
+            sys.exit(1)
+    elif args.cmd == "compare":
+        rows = compare_reports(_load_report(args.baseline), _load_report(args.current), args.threshold)
+        if print_comparison(rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,53 +1,2680 @@
 # quiz_app_full.py
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
-import json, random, csv
+from tkinter import ttk, messagebox, simpledialog, font as tkfont
+import json, random, csv, re, mmap, struct, sys, argparse, threading, time, math, hashlib, itertools, queue, secrets, bisect, heapq, zlib, functools
+from array import array
+from collections import namedtuple, OrderedDict
+from collections.abc import Mapping
 from datetime import datetime
 import os
 
 
 
-# Optional libs
-try:
-    from PIL import Image, ImageTk
-except Exception:
-    Image = None
-    ImageTk = None
+# Optional libs, imported on first use (see load_pil / load_pygame) so they
+# cost nothing at startup; likewise sqlite3 (leaderboard, practice),
+# concurrent.futures (image prefetch) and subprocess (--startup-profile) are
+# imported where they are first needed
+Image = None
+ImageTk = None
+pygame = None
+_optional_lock = threading.Lock()
+_pil_tried = False
+_pygame_tried = False
 
-# Optional for sound
-try:
-    import pygame
-    pygame.mixer.init()
-    SOUND_AVAILABLE = True
-except Exception:
-    SOUND_AVAILABLE = False
+
+def load_pil():
+    global Image, ImageTk, _pil_tried
+    with _optional_lock:
+        if not _pil_tried:
+            _pil_tried = True
+            try:
+                from PIL import Image as _Image, ImageTk as _ImageTk
+                Image, ImageTk = _Image, _ImageTk
+            except Exception:
+                pass
+    return Image is not None
+
+
+def load_pygame():
+    global pygame, _pygame_tried
+    with _optional_lock:
+        if not _pygame_tried:
+            _pygame_tried = True
+            os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+            try:
+                import pygame as _pygame
+                pygame = _pygame
+            except Exception:
+                pass
+    return pygame is not None
 
 # ----------------- Configurable Settings -----------------
 QUESTIONS_JSON = "questions.json"
-LEADERBOARD_CSV = "leaderboard.csv"
+LEADERBOARD_CSV = "leaderboard.csv"   # legacy format, imported once into the DB
+LEADERBOARD_DB = "leaderboard.db"
+LEADERBOARD_TOP = 50
+RESULTS_DIR = "results"      # every finished quiz is appended here (see ResultsWriter)
+RESULTS_BLOCK_ROWS = 4096    # rows per column block
+PRACTICE_DB = "practice.db"
+PRACTICE_LENGTH = 20       # questions per practice run when the count is 0
+PRACTICE_TARGET = 0.7      # new questions aim for this chance of a correct answer
+PRACTICE_K_PLAYER = 0.4    # Elo step for the player's ability (logits)
+PRACTICE_K_QUESTION = 0.1  # ... and for a question's difficulty
+PRACTICE_INTERVAL = 4      # answers until a correctly answered question comes back
+PRACTICE_RELEARN = 3       # answers until a missed question comes back
 TIME_PER_QUESTION = 15  # seconds default
 IMAGE_MAX_SIZE = (320, 220)
+IMAGE_PREFETCH_AHEAD = 3               # decode images for the next N questions
+IMAGE_CACHE_BYTES = 64 * 1024 * 1024   # budget for decoded thumbnails
 SOUNDS = {
     "correct": "correct.wav",
     "wrong": "wrong.wav",
     "timeout": "timeout.wav"
 }
+SOUND_CHANNELS = 4  # mixer channels reserved for feedback sounds
+BANK_POLL_MS = 20   # how often the UI picks up categories from the indexer
+JOURNAL_PATH = "quiz_journal.jsonl"
+JOURNAL_COMMIT_MS = 200  # records arriving within this window share one fsync
+WATCH_POLL_S = 1.0       # stat interval when inotify isn't available
+WATCH_SETTLE_S = 0.05    # quiet time after a write before questions.json is reloaded
+WATCH_CHECK_MS = 250     # how often the UI looks for a pending reload
+METRICS_PATH = "quiz_metrics.prom"  # .json for JSON instead of Prometheus text
+METRICS_DUMP_MS = 10000  # how often the metrics file is rewritten while running
 # ---------------------------------------------------------
 
-def load_questions_from_json(path):
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+# ----------------- Metrics -----------------
+# QUIZ_METRICS=1 (or a file name) in the environment, or --metrics, times the UI
+# hot paths into histograms that are written, with a few gauges such as the
+# image cache hit rate, to METRICS_PATH every METRICS_DUMP_MS and on exit;
+# F12 toggles an overlay with p50/p95/max and the gauges. While
+# switched off (METRICS is None) a @timed function costs one extra call.
+METRICS = None
+METRIC_BUCKETS = tuple(0.0001 * 2 ** i for i in range(18))   # 0.1 ms .. 13 s, upper bounds
+METRIC_HELP = {
+    "quiz_load_question_seconds": "Time to lay out a question (text, options, image, timer).",
+    "quiz_show_image_seconds": "Time to decode (or fetch from cache) and show a question image.",
+    "quiz_play_sound_seconds": "Time for play_sound to start a feedback sound.",
+    "quiz_timer_tick_late_seconds": "How late each countdown tick fired after it was due.",
+    "quiz_leaderboard_query_seconds": "Time to read and sort one leaderboard view.",
+    "quiz_review_window_seconds": "Time to build (or re-show) the review window.",
+    "quiz_result_window_seconds": "Time to build the result window.",
+    "quiz_image_cache_hit_ratio": "Share of question images served from the decoded-thumbnail cache.",
+    "quiz_image_cache_bytes": "Bytes of decoded thumbnails held by the image cache.",
+}
+
 
-def play_sound(name):
-    if not SOUND_AVAILABLE:
-        return
-    fname = SOUNDS.get(name)
-    if not fname or not os.path.isfile(fname):
-        return
+class Histogram:
+    # fixed log-spaced buckets: observe is a bisect and a few adds
+    __slots__ = ("name", "help", "bounds", "counts", "count", "sum", "max")
+
+    def __init__(self, name, help="", bounds=METRIC_BUCKETS):
+        self.name = name
+        self.help = help
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)   # last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        # upper bound of the bucket holding the q-th value (never above the max seen)
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for bound, n in zip(self.bounds, self.counts):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+class Metrics:
+    def __init__(self, path=METRICS_PATH):
+        self.path = path
+        self.histograms = {}
+        self.gauges = {}     # name -> callable read when the metrics are written or shown
+        self._lock = threading.Lock()
+
+    def histogram(self, name):
+        h = self.histograms.get(name)
+        if h is None:
+            h = self.histograms[name] = Histogram(name, METRIC_HELP.get(name, ""))
+        return h
+
+    def observe(self, name, value):
+        with self._lock:
+            self.histogram(name).observe(value)
+
+    def gauge(self, name, read):
+        self.gauges[name] = read
+
+    def _gauge_values(self):
+        return [(name, float(read())) for name, read in list(self.gauges.items())]
+
+    def prometheus(self):
+        lines = []
+        with self._lock:
+            for h in self.histograms.values():
+                lines += [f"# HELP {h.name} {h.help}", f"# TYPE {h.name} histogram"]
+                cumulative = 0
+                for bound, n in zip(h.bounds, h.counts):
+                    cumulative += n
+                    lines.append(f'{h.name}_bucket{{le="{bound:g}"}} {cumulative}')
+                lines += [f'{h.name}_bucket{{le="+Inf"}} {h.count}',
+                          f"{h.name}_sum {h.sum!r}", f"{h.name}_count {h.count}"]
+        for name, value in self._gauge_values():
+            lines += [f"# HELP {name} {METRIC_HELP.get(name, '')}", f"# TYPE {name} gauge", f"{name} {value!r}"]
+        return "\n".join(lines) + "\n"
+
+    def as_dict(self):
+        with self._lock:
+            out = {h.name: {"count": h.count, "sum": h.sum, "max": h.max,
+                            "p50": h.quantile(0.5), "p95": h.quantile(0.95), "p99": h.quantile(0.99),
+                            "buckets": [[bound, n] for bound, n in zip(h.bounds + (None,), h.counts)]}
+                   for h in self.histograms.values()}
+        out.update((name, {"value": value}) for name, value in self._gauge_values())
+        return out
+
+    def dump(self, path=None):
+        path = path or self.path
+        text = json.dumps(self.as_dict(), indent=2) if path.endswith(".json") else self.prometheus()
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+    def summary_lines(self):
+        with self._lock:
+            lines = [f"{h.name[5:-8]:<18} n={h.count:<5} p50 {h.quantile(0.5)*1000:6.1f}  "
+                     f"p95 {h.quantile(0.95)*1000:6.1f}  max {h.max*1000:6.1f} ms"
+                     for h in self.histograms.values()]
+        return lines + [f"{name[5:]:<24} {value:g}" for name, value in self._gauge_values()]
+
+
+def metrics_from_env(value=None):
+    # QUIZ_METRICS: unset/""/"0" off, "1" the default file, anything else a file name
+    value = os.environ.get("QUIZ_METRICS", "") if value is None else value
+    if value in ("", "0"):
+        return None
+    return METRICS_PATH if value == "1" else value
+
+
+def enable_metrics(path=METRICS_PATH):
+    global METRICS
+    METRICS = Metrics(path)
+    return METRICS
+
+
+def timed(name):
+    # record the wall time of each call into histogram `name` while METRICS is on
+    def wrap(fn):
+        @functools.wraps(fn)
+        def timed_call(*args, **kwargs):
+            metrics = METRICS
+            if metrics is None:
+                return fn(*args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                metrics.observe(name, time.perf_counter() - t0)
+        return timed_call
+    return wrap
+
+# ----------------- Question bank -----------------
+# questions.json is a list of {"category": ..., "questions": [...]} objects.
+# Instead of json.load-ing the whole bank at startup we make one streaming pass
+# over the (memory-mapped) file that records, for every category, its name, the
+# byte span of its object and how many questions it holds. A category is only
+# parsed when it is actually picked, so memory stays flat as the bank grows.
+CategoryEntry = namedtuple("CategoryEntry", "name offset length count")
+
+# strings (with escapes) and structural characters; everything else is skipped
+_JSON_TOKEN_RE = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|[\[\]{},:]')
+# inside a category's values only brackets matter: jump over everything else,
+# strings included, in a single match
+_JSON_SKIP_RE = re.compile(rb'[^"{}\[\]]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"{}\[\]]*)*')
+
+
+def scan_category_index(buf, on_entry=None):
+    # on_entry(entry) is called as soon as each category has been scanned
+    return _scan_categories(buf, 0, len(buf), 0, on_entry)[0]
+
+
+def _scan_categories(buf, pos, end, depth, on_entry=None):
+    # scan buf[pos:end] starting at nesting `depth`; returns (entries, depth at end)
+    entries = []
+    start = 0
+    name = None
+    count = 0
+    key = None
+    expect_key = False
+    in_questions = False
+    while pos < end:
+        if depth >= 3:
+            pos = _JSON_SKIP_RE.match(buf, pos, end).end()
+            if pos >= end:
+                break
+            tok_start = pos
+            c = buf[pos]
+            pos += 1
+        else:
+            m = _JSON_TOKEN_RE.search(buf, pos, end)
+            if m is None:
+                break
+            tok_start, pos = m.span()
+            c = buf[tok_start]
+            if c == 0x22:  # '"'
+                if depth == 2:
+                    if expect_key:
+                        key = m.group()
+                    elif key == b'"category"' and name is None:
+                        name = json.loads(m.group())
+                continue
+        if c == 0x7b or c == 0x5b:  # '{' '['
+            depth += 1
+            if depth == 1 and c == 0x7b:
+                raise ValueError("expected a JSON array of categories")
+            if depth == 2:
+                start, name, count, key, in_questions = tok_start, None, 0, None, False
+                expect_key = True
+            elif depth == 3 and c == 0x5b and not expect_key and key == b'"questions"':
+                in_questions = True
+            elif depth == 4 and c == 0x7b and in_questions:
+                count += 1
+        elif c == 0x7d or c == 0x5d:  # '}' ']'
+            if depth == 3:
+                in_questions = False
+            elif depth == 2:
+                entries.append(CategoryEntry(name, start, pos - start, count))
+                if on_entry is not None:
+                    on_entry(entries[-1])
+            depth -= 1
+        elif depth == 2:
+            # ',' starts the next key, ':' switches to its value
+            expect_key = c == 0x2c
+    return entries, depth
+
+
+def _digest(data):
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def _map_file(path):
+    with open(path, "rb") as f:
+        try:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            raise ValueError(f"{path} is empty")
+
+
+class JsonQuestionBank:
+    def __init__(self, path, on_entry=None):
+        self.path = path
+        buf = _map_file(path)
+        try:
+            self.size = len(buf)
+            self.entries = scan_category_index(buf, on_entry)
+            # hashed while the text is at hand: a reload compares against these
+            self.digests = [_digest(buf[e.offset:e.offset + e.length]) for e in self.entries]
+            self.rescanned = (0, len(self.entries))
+        finally:
+            buf.close()
+
+    @classmethod
+    def reindex(cls, path, previous):
+        # Index an edited file reusing `previous`: categories before the edit keep
+        # their offsets, those after it move by the change in size, and only the
+        # bytes in between are scanned again.
+        if not isinstance(previous, cls) or not previous.entries:
+            return cls(path)
+        old, old_digests = previous.entries, previous.digests
+        buf = _map_file(path)
+        try:
+            size = len(buf)
+
+            def unchanged(i, offset):
+                e = old[i]
+                return offset + e.length <= size and _digest(buf[offset:offset + e.length]) == old_digests[i]
+
+            p = 0
+            while p < len(old) and unchanged(p, old[p].offset):
+                p += 1
+            lo = old[p - 1].offset + old[p - 1].length if p else 0
+            delta = size - previous.size
+            q = len(old)
+            while q > p and old[q - 1].offset + delta >= lo and unchanged(q - 1, old[q - 1].offset + delta):
+                q -= 1
+            hi = old[q].offset + delta if q < len(old) else size
+            mid, depth = _scan_categories(buf, lo, hi, 1 if p else 0)
+            if depth != (1 if q < len(old) else 0):
+                # the edit changed the array itself; not worth being clever
+                buf.close()
+                return cls(path)
+            bank = cls.__new__(cls)
+            bank.path, bank.size = path, size
+            bank.entries = old[:p] + mid + [e._replace(offset=e.offset + delta) for e in old[q:]]
+            bank.digests = (old_digests[:p] + [_digest(buf[e.offset:e.offset + e.length]) for e in mid]
+                            + old_digests[q:])
+            bank.rescanned = (p, p + len(mid))
+            return bank
+        finally:
+            if not buf.closed:
+                buf.close()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def names(self):
+        return [e.name if e.name is not None else f"Category {i+1}"
+                for i, e in enumerate(self.entries)]
+
+    def raw_category(self, idx):
+        e = self.entries[idx]
+        with open(self.path, "rb") as f:
+            f.seek(e.offset)
+            return f.read(e.length)
+
+    def load_category(self, idx):
+        # parse just this category's object
+        return json.loads(self.raw_category(idx))
+
+    def category_digest(self, idx):
+        # content hash of the category's JSON text, no parsing needed
+        return self.digests[idx]
+
+
+# ----------------- Compiled question bank -----------------
+# `python quiz1111.py compile` turns questions.json into a .qzb file that is
+# opened with mmap, so question N of category C is a couple of struct reads.
+# Layout (little-endian):
+#   header        magic, version, counts and the offset of every section
+#   categories    n_cats x (name string id, first question, question count,
+#                 content digest of the category's JSON text, as JsonQuestionBank)
+#   questions     n_questions x (question, answer, image, first option,
+#                 option count, extra) -- all string ids / option indices
+#   options       n_options x option string id
+#   string index  (n_strings + 1) x u64 offsets into the pool
+#   string pool   utf-8 text of every distinct string, stored once
+# String id 0 is always "". "extra" holds any other question keys as JSON.
+BANK_MAGIC = b"QZB1"
+BANK_VERSION = 2
+_BANK_HEADER = struct.Struct("<4sI4I5Q")
+_BANK_CAT = struct.Struct("<3I16s")
+_BANK_QUESTION = struct.Struct("<6I")
+_BANK_STROFF = struct.Struct("<2Q")
+_QUESTION_KEYS = ("question", "options", "answer", "image")
+
+
+def compiled_bank_path(json_path):
+    return os.path.splitext(json_path)[0] + ".qzb"
+
+
+def _as_text(v):
+    if v is None:
+        return ""
+    return v if isinstance(v, str) else json.dumps(v, ensure_ascii=False)
+
+
+def compile_question_bank(json_path, out_path=None):
+    out_path = out_path or compiled_bank_path(json_path)
+    src = JsonQuestionBank(json_path)
+    strings = {"": 0}
+    pool = bytearray()
+    str_offsets = array("Q", [0, 0])
+    cats = bytearray()
+    recs = array("I")
+    opts = array("I")
+
+    def intern(text):
+        sid = strings.get(text)
+        if sid is None:
+            sid = strings[text] = len(strings)
+            pool.extend(text.encode("utf-8"))
+            str_offsets.append(len(pool))
+        return sid
+
+    n_questions = 0
+    for idx, name in enumerate(src.names()):
+        # one category in memory at a time
+        qs = src.load_category(idx).get("questions", [])
+        cats += _BANK_CAT.pack(intern(name), n_questions, len(qs), src.digests[idx])
+        for q in qs:
+            options = q.get("options", [])
+            extra = {k: v for k, v in q.items() if k not in _QUESTION_KEYS}
+            recs.extend((intern(_as_text(q.get("question"))), intern(_as_text(q.get("answer"))),
+                         intern(_as_text(q.get("image"))), len(opts), len(options),
+                         intern(json.dumps(extra, ensure_ascii=False, sort_keys=True)) if extra else 0))
+            opts.extend(intern(_as_text(o)) for o in options)
+        n_questions += len(qs)
+
+    if sys.byteorder != "little":
+        for a in (recs, opts, str_offsets):
+            a.byteswap()
+    cat_off = _BANK_HEADER.size
+    q_off = cat_off + len(cats)
+    opt_off = q_off + len(recs) * 4
+    stroff_off = opt_off + len(opts) * 4
+    pool_off = stroff_off + len(str_offsets) * 8
+    tmp = out_path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_BANK_HEADER.pack(BANK_MAGIC, BANK_VERSION, len(src), n_questions, len(opts),
+                                  len(strings), cat_off, q_off, opt_off, stroff_off, pool_off))
+        f.write(cats)
+        for a in (recs, opts, str_offsets):
+            a.tofile(f)
+        f.write(pool)
+    os.replace(tmp, out_path)
+    return out_path
+
+
+class CompiledQuestionBank:
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            (magic, version, n_cats, self.n_questions, _, self.n_strings,
+             self._cat_off, self._q_off, self._opt_off, self._stroff_off,
+             self._pool_off) = _BANK_HEADER.unpack_from(self._mm, 0)
+        except struct.error:
+            self._mm.close()
+            raise ValueError(f"{path} is not a compiled question bank")
+        if magic != BANK_MAGIC or version != BANK_VERSION:
+            self._mm.close()
+            raise ValueError(f"{path} is not a compiled question bank (v{BANK_VERSION})")
+        self.entries = []
+        self.digests = []
+        for c in range(n_cats):
+            name_id, first, count, digest = _BANK_CAT.unpack_from(self._mm, self._cat_off + c * _BANK_CAT.size)
+            self.entries.append(CategoryEntry(self.string(name_id),
+                                              self._q_off + first * _BANK_QUESTION.size,
+                                              count * _BANK_QUESTION.size, count))
+            self.digests.append(digest)
+
+    def close(self):
+        self._mm.close()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def names(self):
+        return [e.name for e in self.entries]
+
+    def string(self, sid):
+        start, end = _BANK_STROFF.unpack_from(self._mm, self._stroff_off + sid * 8)
+        return self._mm[self._pool_off + start:self._pool_off + end].decode("utf-8")
+
+    def get_question(self, cat_idx, n):
+        e = self.entries[cat_idx]
+        if not 0 <= n < e.count:
+            raise IndexError(f"question {n} out of range for {e.name!r}")
+        qid, aid, iid, opt_first, opt_count, extra_id = _BANK_QUESTION.unpack_from(
+            self._mm, e.offset + n * _BANK_QUESTION.size)
+        ids = struct.unpack_from(f"<{opt_count}I", self._mm, self._opt_off + opt_first * 4)
+        q = json.loads(self.string(extra_id)) if extra_id else {}
+        q.update(question=self.string(qid), options=[self.string(i) for i in ids],
+                 answer=self.string(aid), image=self.string(iid))
+        return q
+
+    def load_category(self, idx):
+        e = self.entries[idx]
+        return {"category": e.name,
+                "questions": [self.get_question(idx, n) for n in range(e.count)]}
+
+    def category_digest(self, idx):
+        # hashed at compile time, so the same as the JSON bank's for this text
+        return self.digests[idx]
+
+
+def file_stamp(path):
+    # (mtime, size) used to notice that a file changed; None if missing
     try:
-        pygame.mixer.Sound(fname).play()
-    except Exception:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def load_questions_from_json(path, on_entry=None):
+    # prefer an up-to-date compiled bank, otherwise index the JSON text
+    compiled = compiled_bank_path(path)
+    try:
+        fresh = (os.path.getmtime(compiled) >= os.path.getmtime(path)
+                 if os.path.exists(path) else True)
+        if fresh:
+            bank = CompiledQuestionBank(compiled)
+            if on_entry is not None:
+                for e in bank.entries:
+                    on_entry(e)
+            return bank
+    except (OSError, ValueError):
         pass
+    return JsonQuestionBank(path, on_entry)
+
+
+def reload_questions(previous, path):
+    # the bank after questions.json changed, re-indexing only what was edited
+    if isinstance(previous, JsonQuestionBank):
+        compiled = compiled_bank_path(path)
+        if not (os.path.exists(compiled) and os.path.getmtime(compiled) >= os.path.getmtime(path)):
+            return JsonQuestionBank.reindex(path, previous)
+    return load_questions_from_json(path)
+
+
+# ----------------- File watching -----------------
+# FileWatcher calls on_change() from its own thread shortly after a file is
+# written or replaced (editors often save by renaming a temp file over it).
+# Linux uses inotify on the containing directory; elsewhere the file's stamp
+# is polled.
+_IN_MODIFY, _IN_CLOSE_WRITE, _IN_MOVED_TO, _IN_CREATE = 0x2, 0x8, 0x80, 0x100
+_IN_NONBLOCK, _IN_CLOEXEC = 0o4000, 0o2000000
+_INOTIFY_EVENT = struct.Struct("iIII")
+
+
+class FileWatcher:
+    def __init__(self, path, on_change, poll_s=WATCH_POLL_S, settle_s=WATCH_SETTLE_S):
+        self.path = os.path.abspath(path)
+        self.on_change = on_change
+        self.poll_s = poll_s
+        self.settle_s = settle_s   # events closer together than this count as one save
+        self.mode = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._fd = None
+
+    def start(self):
+        self._fd = self._inotify()
+        self.mode = "inotify" if self._fd is not None else "poll"
+        target = self._watch_inotify if self._fd is not None else self._watch_poll
+        self._thread = threading.Thread(target=target, name="bank-watch", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _inotify(self):
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            import ctypes
+            libc = ctypes.CDLL(None, use_errno=True)
+            fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+            if fd < 0:
+                return None
+            mask = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+            if libc.inotify_add_watch(fd, os.fsencode(os.path.dirname(self.path)), mask) < 0:
+                os.close(fd)
+                return None
+            return fd
+        except (OSError, AttributeError):
+            return None
+
+    def _drain(self):
+        # True if any pending event names our file
+        name = os.fsencode(os.path.basename(self.path))
+        hit = False
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return hit
+            pos = 0
+            while pos < len(data):
+                _, _, _, length = _INOTIFY_EVENT.unpack_from(data, pos)
+                pos += _INOTIFY_EVENT.size
+                hit = hit or data[pos:pos + length].rstrip(b"\0") == name
+                pos += length
+
+    def _watch_inotify(self):
+        import select
+        while not self._stop.is_set():
+            ready, _, _ = select.select([self._fd], [], [], self.poll_s)
+            if not ready or not self._drain():
+                continue
+            # let the writer finish before reporting a single change
+            while select.select([self._fd], [], [], self.settle_s)[0]:
+                self._drain()
+            self.on_change()
+
+    def _watch_poll(self):
+        last = file_stamp(self.path)
+        while not self._stop.wait(self.poll_s):
+            stamp = file_stamp(self.path)
+            if stamp != last:
+                if self._stop.wait(self.settle_s):
+                    break
+                last = file_stamp(self.path)
+                self.on_change()
+
+# ----------------- Images -----------------
+# Decoding and thumbnailing happen on worker threads; only the cheap
+# ImageTk.PhotoImage step is left for the Tk thread.
+def decode_thumbnail(path):
+    img = Image.open(path)
+    img.thumbnail(IMAGE_MAX_SIZE)
+    img.load()
+    return img
+
+
+class ImageCache:
+    # LRU of decoded thumbnails keyed by (path, mtime, size), bounded in bytes
+    def __init__(self, max_bytes=IMAGE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(path):
+        st = os.stat(path)
+        return (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._items
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key, img):
+        size = img.width * img.height * len(img.getbands())
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[1]
+            self._items[key] = (img, size)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes and len(self._items) > 1:
+                _, (_, evicted) = self._items.popitem(last=False)
+                self.nbytes -= evicted
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class ImagePrefetcher:
+    def __init__(self, cache=None, workers=2):
+        self.cache = cache if cache is not None else ImageCache()
+        self.workers = workers
+        self._pool = None   # started with the first prefetch
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def _decode(self, key, path):
+        try:
+            img = decode_thumbnail(path)
+            self.cache.put(key, img)
+            return img
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def prefetch(self, paths):
+        if not load_pil():
+            return
+        for path in paths:
+            if not path:
+                continue
+            try:
+                key = ImageCache.key_for(path)
+            except OSError:
+                continue
+            with self._lock:
+                if key in self._pending or key in self.cache:
+                    continue
+                if self._pool is None:
+                    from concurrent.futures import ThreadPoolExecutor
+                    self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="image-prefetch")
+                self._pending[key] = self._pool.submit(self._decode, key, path)
+
+    def get(self, path):
+        # decoded thumbnail for path; waits for an in-flight prefetch if any
+        key = ImageCache.key_for(path)
+        img = self.cache.get(key)
+        if img is not None:
+            return img
+        with self._lock:
+            fut = self._pending.get(key)
+        if fut is not None:
+            return fut.result()
+        img = decode_thumbnail(path)
+        self.cache.put(key, img)
+        return img
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+# ----------------- Sounds -----------------
+# Every sound is decoded once and played on a fixed set of reserved mixer
+# channels, so an answer/timeout never touches the disk on the Tk thread.
+# Headless runs work with SDL_AUDIODRIVER=dummy.
+class SoundBank:
+    def __init__(self, sounds=SOUNDS, channels=SOUND_CHANNELS):
+        self.sounds = dict(sounds)
+        self.n_channels = channels
+        self.available = None   # unknown until the mixer is first needed
+        self._buffers = {}
+        self._channels = []
+        self._next = 0
+        self._thread = None
+
+    def init(self):
+        if self.available is not None:
+            return self.available
+        # False while initialising, so play() skips instead of waiting
+        self.available = False
+        if not load_pygame():
+            return False
+        try:
+            if not pygame.mixer.get_init():
+                pygame.mixer.init()
+            pygame.mixer.set_num_channels(max(pygame.mixer.get_num_channels(), self.n_channels))
+            pygame.mixer.set_reserved(self.n_channels)
+            self._channels = [pygame.mixer.Channel(i) for i in range(self.n_channels)]
+        except Exception:
+            return False
+        self.available = True
+        return True
+
+    def preload(self):
+        if self.init():
+            for name in self.sounds:
+                self._load(name)
+            startup_mark("mixer ready")
+
+    def preload_in_background(self):
+        # importing pygame and opening the audio device can take a while
+        if self._thread is None and self.available is None:
+            self._thread = threading.Thread(target=self.preload, name="sound-init", daemon=True)
+            self._thread.start()
+
+    def _load(self, name):
+        try:
+            return self._buffers[name]
+        except KeyError:
+            pass
+        fname = self.sounds.get(name)
+        snd = None
+        if fname and os.path.isfile(fname):
+            try:
+                snd = pygame.mixer.Sound(fname)
+            except Exception:
+                snd = None
+        # remember misses too so a missing file is only checked once
+        self._buffers[name] = snd
+        return snd
+
+    def play(self, name):
+        if not self.available and (self.available is False or not self.init()):
+            return
+        snd = self._buffers.get(name) or self._load(name)
+        if snd is None:
+            return
+        ch = self._channels[self._next]
+        self._next = (self._next + 1) % self.n_channels
+        try:
+            ch.play(snd)
+        except Exception:
+            pass
+
+
+SOUND_BANK = SoundBank()
+
+@timed("quiz_play_sound_seconds")
+def play_sound(name):
+    SOUND_BANK.play(name)
+
+# ----------------- Leaderboard store -----------------
+# Scores live in SQLite with indexes on (pct, score), so the top-K overall,
+# per category or per player is an index range scan instead of a full
+# re-parse and sort of the CSV.
+LeaderboardRow = namedtuple("LeaderboardRow", "name score total pct category ts")
+
+_LEADERBOARD_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    pct REAL NOT NULL,
+    category TEXT NOT NULL DEFAULT '',
+    ts TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scores_rank ON scores (pct DESC, score DESC);
+CREATE INDEX IF NOT EXISTS scores_category ON scores (category, pct DESC, score DESC);
+CREATE INDEX IF NOT EXISTS scores_player ON scores (name, pct DESC, score DESC);
+CREATE INDEX IF NOT EXISTS scores_player_category ON scores (name, category, pct DESC, score DESC);
+CREATE TABLE IF NOT EXISTS imports (
+    path TEXT PRIMARY KEY,
+    rows INTEGER NOT NULL,
+    ts TEXT NOT NULL
+);
+"""
+_LEADERBOARD_COLS = "name, score, total, pct, category, ts"
+_LEADERBOARD_ORDER = "ORDER BY pct DESC, score DESC LIMIT ?"
+
+
+def score_pct(score, total):
+    return (score/total)*100 if total>0 else 0
+
+
+class LeaderboardStore:
+    def __init__(self, path=LEADERBOARD_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        import sqlite3
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_LEADERBOARD_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def add(self, name, score, total, category="", ts=None):
+        self.add_many([(name, score, total, category, ts)])
+
+    def add_many(self, rows):
+        # rows of (name, score, total, category, ts); one transaction for all
+        with self._lock, self._db:
+            self._insert(rows)
+
+    def _insert(self, rows):
+        # inside the caller's transaction
+        now = datetime.now().isoformat()
+        values = [(name, score, total, score_pct(score, total), category or "", ts or now)
+                  for name, score, total, category, ts in rows]
+        self._db.executemany(f"INSERT INTO scores ({_LEADERBOARD_COLS}) VALUES (?, ?, ?, ?, ?, ?)", values)
+
+    @timed("quiz_leaderboard_query_seconds")
+    def _query(self, where, args, k):
+        with self._lock:
+            cur = self._db.execute(f"SELECT {_LEADERBOARD_COLS} FROM scores {where} {_LEADERBOARD_ORDER}",
+                                   (*args, k))
+            return [LeaderboardRow(*r) for r in cur]
+
+    def top(self, k=LEADERBOARD_TOP):
+        return self._query("", (), k)
+
+    def top_for_category(self, category, k=LEADERBOARD_TOP):
+        return self._query("WHERE category = ?", (category,), k)
+
+    def for_player(self, name, k=LEADERBOARD_TOP):
+        return self._query("WHERE name = ?", (name,), k)
+
+    def for_player_in_category(self, name, category, k=LEADERBOARD_TOP):
+        return self._query("WHERE name = ? AND category = ?", (name, category), k)
+
+    def categories(self):
+        with self._lock:
+            return [r[0] for r in self._db.execute("SELECT DISTINCT category FROM scores WHERE category != '' ORDER BY category")]
+
+    def import_csv(self, csv_path):
+        # one-time import of a legacy name,score,total,timestamp file
+        key = os.path.abspath(csv_path)
+        with self._lock:
+            if self._db.execute("SELECT 1 FROM imports WHERE path = ?", (key,)).fetchone():
+                return 0
+        rows = []
+        with open(csv_path, "r", encoding="utf-8") as f:
+            for row in csv.reader(f):
+                if len(row) >= 4:
+                    try:
+                        rows.append((row[0], int(row[1]), int(row[2]), "", row[3]))
+                    except ValueError:
+                        continue
+        # the rows and the marker commit together: a crash can't import twice
+        with self._lock, self._db:
+            if self._db.execute("SELECT 1 FROM imports WHERE path = ?", (key,)).fetchone():
+                return 0
+            self._insert(rows)
+            self._db.execute("INSERT INTO imports (path, rows, ts) VALUES (?, ?, ?)",
+                             (key, len(rows), datetime.now().isoformat()))
+        return len(rows)
+
+
+def open_leaderboard(db_path=LEADERBOARD_DB, csv_path=LEADERBOARD_CSV):
+    store = LeaderboardStore(db_path)
+    if csv_path and os.path.isfile(csv_path):
+        store.import_csv(csv_path)
+    return store
+
+# ----------------- Results dataset -----------------
+# Every finished quiz is appended, one row per question, to a dataset under
+# RESULTS_DIR partitioned by day:
+#   results/date=2026-10-17/part-<pid>-<start>-<token>.qzr
+# Each writer appends to its own part file, in blocks of rows stored by column:
+#   header   magic, rows, distinct strings, bloom bytes, payload bytes, crc32
+#   bloom    Bloom filter over the block's players, categories and questions
+#   payload  zlib of: string offsets (u32), string bytes, one u32 dictionary id
+#            column per string field, then position (u32) and correct (u8)
+# Strings are dictionary-encoded per block, so a question text or player name
+# is stored once per block however many rows repeat it. A reader looking for
+# one player or question reads only block headers and Bloom filters, and
+# decompresses just the blocks that may contain it. A torn block at the end of
+# a part (crash mid-write) is ignored.
+RESULTS_MAGIC = b"QZR1"
+_RESULTS_BLOCK = struct.Struct("<4sIIIII")
+_RESULT_STRINGS = ("session", "player", "category", "seed", "ts", "question", "chosen", "answer")
+_BLOOM_HASHES = 4
+
+ResultRow = namedtuple("ResultRow", "session player category seed ts position question chosen answer correct")
+
+
+def session_result_rows(session, session_id, player="", category="", seed=None, ts=None):
+    # the rows of a finished QuizSession
+    ts = ts or datetime.now().isoformat(timespec="seconds")
+    seed = "" if seed is None else str(seed)
+    rows = []
+    for i, (q, chosen) in enumerate(zip(session.questions, session.answers)):
+        answer = q.get("answer")
+        rows.append(ResultRow(session_id or "", player or "", category or "", seed, ts, i,
+                              _as_text(q.get("question")), _as_text(chosen), _as_text(answer),
+                              chosen == answer))
+    return rows
+
+
+def _bloom_positions(s, n_bits):
+    h = hashlib.blake2b(s.encode("utf-8"), digest_size=4 * _BLOOM_HASHES).digest()
+    return [int.from_bytes(h[4 * k:4 * k + 4], "little") % n_bits for k in range(_BLOOM_HASHES)]
+
+
+def _bloom_has(bloom, s):
+    n_bits = len(bloom) * 8
+    return all(bloom[p >> 3] & (1 << (p & 7)) for p in _bloom_positions(s, n_bits))
+
+
+def encode_result_block(rows):
+    strings, ids = [], {}
+    cols = [array("I") for _ in _RESULT_STRINGS]
+    position, correct = array("I"), array("B")
+    keys = set()
+    for r in rows:
+        for col, value in zip(cols, (r.session, r.player, r.category, r.seed, r.ts,
+                                     r.question, r.chosen, r.answer)):
+            i = ids.get(value)
+            if i is None:
+                i = ids[value] = len(strings)
+                strings.append(value)
+            col.append(i)
+        position.append(r.position)
+        correct.append(1 if r.correct else 0)
+        keys.update((r.player, r.category, r.question))
+    n_bits = max(512, 16 * len(keys) + 7) // 8 * 8
+    bloom = bytearray(n_bits // 8)
+    for key in keys:
+        for p in _bloom_positions(key, n_bits):
+            bloom[p >> 3] |= 1 << (p & 7)
+    blob = bytearray()
+    offsets = array("I", [0])
+    for s in strings:
+        blob += s.encode("utf-8")
+        offsets.append(len(blob))
+    arrays = [offsets, *cols, position]
+    if sys.byteorder != "little":
+        for a in arrays:
+            a.byteswap()
+    payload = zlib.compress(b"".join([offsets.tobytes(), bytes(blob)] + [c.tobytes() for c in cols]
+                                     + [position.tobytes(), correct.tobytes()]), 6)
+    header = _RESULTS_BLOCK.pack(RESULTS_MAGIC, len(rows), len(strings), len(bloom), len(payload),
+                                 zlib.crc32(payload))
+    return header + bytes(bloom) + payload
+
+
+def decode_result_block(n_rows, n_strings, payload):
+    # (strings, {column: array}) for one block
+    data = zlib.decompress(payload)
+    offsets = array("I")
+    offsets.frombytes(data[:(n_strings + 1) * 4])
+    if sys.byteorder != "little":
+        offsets.byteswap()
+    pos = (n_strings + 1) * 4
+    blob = data[pos:pos + offsets[-1]]
+    strings = [blob[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(n_strings)]
+    pos += offsets[-1]
+    cols = {}
+    for name in _RESULT_STRINGS + ("position",):
+        a = array("I")
+        a.frombytes(data[pos:pos + n_rows * 4])
+        if sys.byteorder != "little":
+            a.byteswap()
+        cols[name] = a
+        pos += n_rows * 4
+    cols["correct"] = array("B", data[pos:pos + n_rows])
+    return strings, cols
+
+
+def _result_rows(strings, cols, indices=None):
+    # ResultRows of a decoded block, column by column rather than row by row
+    get = strings.__getitem__
+    if indices is None:
+        pick = lambda col: col
+    else:
+        pick = lambda col: [col[r] for r in indices]
+    text = [list(map(get, pick(cols[n]))) for n in _RESULT_STRINGS]
+    return map(ResultRow._make, zip(*text[:5], pick(cols["position"]), *text[5:],
+                                    map(bool, pick(cols["correct"]))))
+
+
+class ResultsWriter:
+    # Appends rows to today's partition; rows are buffered until block_rows
+    # are pending or flush() is called. One writer per process.
+    def __init__(self, root=RESULTS_DIR, block_rows=RESULTS_BLOCK_ROWS):
+        self.root = root
+        self.block_rows = block_rows
+        self.name = f"part-{os.getpid()}-{int(time.time())}-{secrets.token_hex(3)}.qzr"
+        self._pending = {}   # date -> rows
+        self._files = {}
+        self._lock = threading.Lock()
+        self.rows = 0
+        self.blocks = 0
+
+    def append(self, rows):
+        with self._lock:
+            for r in rows:
+                pending = self._pending.setdefault(r.ts[:10], [])
+                pending.append(r)
+                if len(pending) >= self.block_rows:
+                    self._write(r.ts[:10])
+
+    def _write(self, date):
+        rows = self._pending.pop(date, None)
+        if not rows:
+            return
+        f = self._files.get(date)
+        if f is None:
+            part = os.path.join(self.root, f"date={date}")
+            os.makedirs(part, exist_ok=True)
+            f = self._files[date] = open(os.path.join(part, self.name), "ab")
+        f.write(encode_result_block(rows))
+        f.flush()
+        self.rows += len(rows)
+        self.blocks += 1
+
+    def flush(self):
+        with self._lock:
+            for date in list(self._pending):
+                self._write(date)
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            for f in self._files.values():
+                f.close()
+            self._files.clear()
+
+
+class ResultsDataset:
+    def __init__(self, root=RESULTS_DIR):
+        self.root = root
+
+    def partitions(self, since=None, until=None):
+        # dates present, optionally limited to since <= date <= until (YYYY-MM-DD)
+        try:
+            names = os.listdir(self.root)
+        except FileNotFoundError:
+            return []
+        dates = sorted(n[5:] for n in names if n.startswith("date="))
+        return [d for d in dates if (not since or d >= since) and (not until or d <= until)]
+
+    def files(self, since=None, until=None):
+        for date in self.partitions(since, until):
+            part = os.path.join(self.root, f"date={date}")
+            for name in sorted(os.listdir(part)):
+                if name.endswith(".qzr"):
+                    yield os.path.join(part, name)
+
+    @staticmethod
+    def blocks(path, keys=()):
+        # (n_rows, n_strings, payload) for the blocks of one part whose Bloom
+        # filter admits every key; others are skipped without reading them
+        with open(path, "rb") as f:
+            while True:
+                header = f.read(_RESULTS_BLOCK.size)
+                if len(header) < _RESULTS_BLOCK.size:
+                    return
+                magic, n_rows, n_strings, bloom_len, payload_len, crc = _RESULTS_BLOCK.unpack(header)
+                if magic != RESULTS_MAGIC:
+                    return
+                bloom = f.read(bloom_len)
+                if len(bloom) < bloom_len:
+                    return
+                if not all(_bloom_has(bloom, k) for k in keys):
+                    f.seek(payload_len, os.SEEK_CUR)
+                    continue
+                payload = f.read(payload_len)
+                if len(payload) < payload_len or zlib.crc32(payload) != crc:
+                    return  # torn tail
+                yield n_rows, n_strings, payload
+
+    def scan(self, player=None, question=None, category=None, session=None, since=None, until=None):
+        # ResultRow for every stored answer matching all the given filters
+        wanted = {"player": player, "question": question, "category": category, "session": session}
+        wanted = {k: v for k, v in wanted.items() if v is not None}
+        keys = [v for k, v in wanted.items() if k != "session"]
+        for path in self.files(since, until):
+            for n_rows, n_strings, payload in self.blocks(path, keys):
+                strings, cols = decode_result_block(n_rows, n_strings, payload)
+                match = None
+                if wanted:
+                    where = {s: i for i, s in enumerate(strings)}
+                    if any(v not in where for v in wanted.values()):
+                        continue  # a Bloom false positive
+                    tests = [(cols[k], where[v]) for k, v in wanted.items()]
+                    match = [r for r in range(n_rows) if all(col[r] == i for col, i in tests)]
+                yield from _result_rows(strings, cols, match)
+
+    def compact(self, block_rows=RESULTS_BLOCK_ROWS):
+        # Rewrite each partition that has several parts or part-full blocks
+        # (the app writes a block per quiz) as one part of full blocks, with
+        # rows clustered by player and session so a player's answers share a
+        # few blocks. Only run while nothing is writing to the dataset.
+        for date in self.partitions():
+            paths = list(self.files(date, date))
+            headers = [(n_rows, path) for path in paths for n_rows in self._block_sizes(path)]
+            n_rows = sum(n for n, _ in headers)
+            if len(paths) < 2 and len(headers) <= -(-n_rows // block_rows):
+                continue
+            rows = []
+            for path in paths:
+                for n, n_strings, payload in self.blocks(path):
+                    rows.extend(_result_rows(*decode_result_block(n, n_strings, payload)))
+            rows.sort(key=lambda r: (r.player, r.session, r.position))
+            writer = ResultsWriter(self.root, block_rows)
+            writer.append(rows)
+            writer.close()
+            for path in paths:
+                os.remove(path)
+
+    @staticmethod
+    def _block_sizes(path):
+        with open(path, "rb") as f:
+            while True:
+                header = f.read(_RESULTS_BLOCK.size)
+                if len(header) < _RESULTS_BLOCK.size:
+                    return
+                magic, n_rows, _, bloom_len, payload_len, _ = _RESULTS_BLOCK.unpack(header)
+                if magic != RESULTS_MAGIC:
+                    return
+                yield n_rows
+                f.seek(bloom_len + payload_len, os.SEEK_CUR)
+
+# ----------------- Quiz engine -----------------
+# Everything a quiz needs apart from the widgets: normalising a category's
+# questions, navigation, timeouts and scoring. QuizApp is a view over a
+# QuizSession, and the same engine runs headless (see bench_quiz.py).
+def normalize_question(q):
+    # ensure options exist and answer in them
+    options = list(q.get("options", []))
+    if q.get("answer") not in options:
+        # place correct answer first then extend unique options
+        if q.get("answer"):
+            options = [q["answer"]] + [o for o in options if o != q["answer"]]
+    # pad options to at least 2 (UI expects up to 4)
+    while len(options) < 2:
+        options.append("")
+    # truncate/pad to 4
+    options = options[:4] + ([""] * max(0, 4 - len(options)))
+    return {
+        "question": q.get("question", ""),
+        "options": options,
+        "answer": q.get("answer", ""),
+        "image": q.get("image", "")
+    }
+
+
+class Question(namedtuple("Question", "question options answer image tag difficulty")):
+    # immutable normalised question; .get() keeps the dict-style call sites
+    __slots__ = ()
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self._fields else default
+
+    @classmethod
+    def from_raw(cls, q):
+        d = normalize_question(q)
+        return cls(d["question"], tuple(d["options"]), d["answer"], d["image"],
+                   _as_text(q.get("tag")), _as_text(q.get("difficulty")))
+
+
+class StringTable:
+    # Every distinct string once; questions refer to them by id (0 is "").
+    # Strings of categories that were reloaded away stay until the owning
+    # NormalizationCache is cleared.
+    __slots__ = ("strings", "_ids", "_lock")
+
+    def __init__(self):
+        self.strings = [""]
+        self._ids = {"": 0}
+        self._lock = threading.Lock()
+
+    def intern(self, s):
+        i = self._ids.get(s)
+        if i is None:
+            with self._lock:
+                i = self._ids.get(s)
+                if i is None:
+                    i = self._ids[s] = len(self.strings)
+                    self.strings.append(s)
+        return i
+
+    def __len__(self):
+        return len(self.strings)
+
+
+class QuestionSet:
+    # The normalised questions of one category, stored by column. Text is held
+    # as ids into a StringTable shared by all categories, so strings such as
+    # "True" or "None of the above" exist once; each question has exactly four
+    # option ids and its own answer id (the answer need not be one of the
+    # four: normalize_question keeps it even when the options were cut).
+    __slots__ = ("strings", "question_ids", "option_ids", "answer_ids", "image_ids",
+                 "tag_ids", "difficulty_ids", "digest", "category", "_strata")
+
+    def __init__(self, questions=(), strings=None):
+        self.strings = strings = QUESTION_CACHE.strings if strings is None else strings
+        self.question_ids, self.option_ids = array("I"), array("I")
+        self.answer_ids = array("I")
+        self.image_ids, self.tag_ids, self.difficulty_ids = array("I"), array("I"), array("I")
+        self.digest = self.category = None
+        self._strata = {}
+        known, intern = strings._ids.get, strings.intern
+        add_question, add_options = self.question_ids.append, self.option_ids.extend
+        add_answer, add_image = self.answer_ids.append, self.image_ids.append
+        add_tag, add_difficulty = self.tag_ids.append, self.difficulty_ids.append
+        for q in questions:
+            src = q._set if isinstance(q, QuestionView) else None
+            if src is not None and src.strings is strings:
+                # already interned here: copy the ids
+                i = q._i
+                add_question(src.question_ids[i])
+                add_options(src.option_ids[4 * i:4 * i + 4])
+                add_answer(src.answer_ids[i])
+                add_image(src.image_ids[i])
+                add_tag(src.tag_ids[i])
+                add_difficulty(src.difficulty_ids[i])
+                continue
+            options = [o if type(o) is str else _as_text(o) for o in q.options[:4]]
+            if len(options) < 4:
+                options += [""] * (4 - len(options))
+            answer = q.answer if type(q.answer) is str else _as_text(q.answer)
+            add_options([known(o) or intern(o) for o in options])
+            add_answer(known(answer) or intern(answer))
+            text = q.question if type(q.question) is str else _as_text(q.question)
+            add_question(known(text) or intern(text))
+            image = q.image if type(q.image) is str else _as_text(q.image)
+            add_image(known(image) or intern(image))
+            add_tag(known(q.tag) or intern(q.tag))
+            add_difficulty(known(q.difficulty) or intern(q.difficulty))
+
+    def __len__(self):
+        return len(self.question_ids)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [QuestionView(self, k) for k in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("question index out of range")
+        return QuestionView(self, i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield QuestionView(self, i)
+
+    def strata(self, field):
+        # {value of field: array of question indices}, built once per field
+        groups = self._strata.get(field)
+        if groups is None:
+            strings = self.strings.strings
+            by_id = {}
+            for i, sid in enumerate(getattr(self, field + "_ids")):
+                by_id.setdefault(sid, array("I")).append(i)
+            groups = self._strata[field] = {strings[sid]: idx for sid, idx in by_id.items()}
+        return groups
+
+
+class QuestionView(Mapping):
+    # One question of a QuestionSet, optionally with its options reordered by
+    # a PERMUTATIONS_4 entry. Read-only; works both as q.options and as the
+    # question dicts the UI was written against (q["options"], q.get("answer")).
+    __slots__ = ("_set", "_i", "_perm")
+    _fields = Question._fields
+
+    def __init__(self, qset, i, perm=None):
+        self._set = qset
+        self._i = i
+        self._perm = perm
+
+    @property
+    def question(self):
+        return self._set.strings.strings[self._set.question_ids[self._i]]
+
+    @property
+    def options(self):
+        s, i = self._set, 4 * self._i
+        strings, ids = s.strings.strings, s.option_ids
+        if self._perm is None:
+            return (strings[ids[i]], strings[ids[i + 1]], strings[ids[i + 2]], strings[ids[i + 3]])
+        return tuple(strings[ids[i + k]] for k in self._perm)
+
+    @property
+    def answer(self):
+        return self._set.strings.strings[self._set.answer_ids[self._i]]
+
+    @property
+    def image(self):
+        return self._set.strings.strings[self._set.image_ids[self._i]]
+
+    @property
+    def tag(self):
+        return self._set.strings.strings[self._set.tag_ids[self._i]]
+
+    @property
+    def difficulty(self):
+        return self._set.strings.strings[self._set.difficulty_ids[self._i]]
+
+    def __getitem__(self, key):
+        if key in self._fields:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        # Mapping.get goes through __getitem__ and a try; this is on every answer
+        return getattr(self, key) if key in self._fields else default
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __repr__(self):
+        return f"QuestionView({dict(self)!r})"
+
+
+class NormalizationCache:
+    # Normalised categories keyed by a content hash of the raw category, so a
+    # category is validated/padded once however often it is started.
+    def __init__(self):
+        self._items = {}
+        self.strings = StringTable()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, bank, idx):
+        digest = bank.category_digest(idx)
+        qs = self._items.get(digest)
+        if qs is None:
+            self.misses += 1
+            raw = bank.load_category(idx).get("questions", [])
+            qs = self._items[digest] = QuestionSet((Question.from_raw(q) for q in raw), self.strings)
+            qs.digest = digest
+            qs.category = bank.entries[idx].name
+        else:
+            self.hits += 1
+        return qs
+
+    def refresh(self, bank):
+        # After a reload: keep what is still in the bank and drop the rest; an
+        # edited category is normalised again when it is next started. Returns
+        # how many entries were dropped.
+        live = {bank.category_digest(i) for i in range(len(bank))}
+        gone = [d for d in self._items if d not in live]
+        for d in gone:
+            del self._items[d]
+        return len(gone)
+
+    def peek(self, bank, idx):
+        # the cached category, without loading it
+        return self._items.get(bank.category_digest(idx))
+
+    def clear(self):
+        self._items.clear()
+        self.strings = StringTable()
+
+
+QUESTION_CACHE = NormalizationCache()
+
+
+# ----------------- Search -----------------
+# An inverted index over question text, options and category names, so a quiz
+# can be assembled from a keyword search across the whole bank, e.g.
+# "binary AND number", "python logo", "(loop OR iter*) NOT java".
+# Documents are questions. Every indexed category is a segment of consecutive
+# doc ids keyed by its content digest: after an edit only new or changed
+# categories are tokenised and appended, and segments of categories that are
+# gone are marked dead until there are enough of them to compact. A term's
+# postings are its sorted doc ids plus a one-byte weight per doc (occurrences,
+# question text counting most). Saved next to the bank as <json>.qzi:
+#   header        magic, version, counts, size of the term list
+#   segments      n_segments x (digest, first doc, question count, dead)
+#   terms         sorted terms joined by "\n" (utf-8)
+#   offsets       (n_terms + 1) x u64 into the postings
+#   docs          u32 doc ids, then u8 weights
+INDEX_MAGIC = b"QZI1"
+INDEX_VERSION = 1
+_INDEX_HEADER = struct.Struct("<4sIIIQQ")  # magic, version, segments, terms, term bytes, postings
+_INDEX_SEG = struct.Struct("<16sIIB")
+_TOKEN_RE = re.compile(r"\w+")
+_QUERY_RE = re.compile(r"[()]|[^\s()]+")
+_WEIGHT_QUESTION, _WEIGHT_CATEGORY, _WEIGHT_OPTION = 3, 2, 1
+SEARCH_LIMIT = 200  # most questions a search quiz is drawn from
+
+SearchSegment = namedtuple("SearchSegment", "digest first count")
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(_as_text(text).casefold())
+
+
+def search_index_path(json_path):
+    return os.path.splitext(json_path)[0] + ".qzi"
+
+
+def parse_query(text):
+    # AND binds tighter than OR, adjacent words are ANDed, NOT excludes and a
+    # trailing * matches any term with that prefix. Returns a tree of
+    # ("term", term, prefix) / ("and", [nodes]) / ("or", [nodes]) / ("not", node).
+    toks = _QUERY_RE.findall(text)
+    pos = 0
+
+    def peek():
+        return toks[pos] if pos < len(toks) else None
+
+    def take():
+        nonlocal pos
+        pos += 1
+        return toks[pos - 1]
+
+    def parse_or():
+        items = [parse_and()]
+        while peek() == "OR":
+            take()
+            items.append(parse_and())
+        return items[0] if len(items) == 1 else ("or", items)
+
+    def parse_and():
+        items = [parse_not()]
+        while peek() not in (None, ")", "OR"):
+            if peek() == "AND":
+                take()
+            items.append(parse_not())
+        return items[0] if len(items) == 1 else ("and", items)
+
+    def parse_not():
+        if peek() == "NOT":
+            take()
+            return ("not", parse_not())
+        tok = peek()
+        if tok is None or tok == ")" or tok in ("AND", "OR"):
+            raise ValueError(f"incomplete search: {text!r}")
+        take()
+        if tok == "(":
+            node = parse_or()
+            if peek() == ")":
+                take()
+            return node
+        terms = tokenize(tok.rstrip("*"))
+        if not terms:
+            raise ValueError(f"nothing to search for in {tok!r}")
+        leaves = [("term", t, False) for t in terms]
+        if tok.endswith("*"):
+            leaves[-1] = ("term", terms[-1], True)
+        return leaves[0] if len(leaves) == 1 else ("and", leaves)
+
+    if not toks:
+        raise ValueError("empty search")
+    node = parse_or()
+    if pos < len(toks):
+        raise ValueError(f"unexpected {toks[pos]!r} in search")
+    return node
+
+
+class SearchIndex:
+    def __init__(self):
+        self.postings = {}   # term -> (array("I") doc ids, array("B") weights)
+        self.segments = []   # SearchSegment per indexed category, in doc order
+        self.dead = set()    # numbers of segments whose category is gone
+        self.n_docs = 0
+        self.bank = None     # bank of the last sync; `where` maps its digests to indices
+        self.where = {}
+        self.lock = threading.Lock()
+        self._firsts = []
+        self._terms = None   # sorted terms for prefix lookups, rebuilt lazily
+
+    # ---------- Updating ----------
+    def sync(self, bank):
+        # index what is new in bank and drop what is gone; returns (added, dropped)
+        with self.lock:
+            where = {}
+            for i in range(len(bank)):
+                where.setdefault(bank.category_digest(i), i)
+            seen = set()
+            dropped = 0
+            for s, seg in enumerate(self.segments):
+                if s in self.dead:
+                    continue
+                if seg.digest in where and seg.digest not in seen:
+                    seen.add(seg.digest)
+                else:
+                    self.dead.add(s)
+                    dropped += 1
+            added = 0
+            for digest, i in where.items():
+                if digest not in seen:
+                    questions = bank.load_category(i).get("questions", [])
+                    self._add(digest, [Question.from_raw(q) for q in questions], bank.entries[i].name)
+                    added += 1
+            if sum(self.segments[s].count for s in self.dead) * 2 > self.n_docs:
+                self._compact()
+            if added or dropped:
+                self._terms = None
+            self.bank, self.where = bank, where
+            return added, dropped
+
+    def _add(self, digest, questions, category):
+        postings = self.postings
+        first = self.n_docs
+        cat_terms = tokenize(category)
+        for doc, q in enumerate(questions, first):
+            counts = dict.fromkeys(cat_terms, _WEIGHT_CATEGORY)
+            for t in tokenize(q.question):
+                counts[t] = counts.get(t, 0) + _WEIGHT_QUESTION
+            for option in q.options:
+                for t in tokenize(option):
+                    counts[t] = counts.get(t, 0) + _WEIGHT_OPTION
+            for t, w in counts.items():
+                p = postings.get(t)
+                if p is None:
+                    p = postings[t] = (array("I"), array("B"))
+                p[0].append(doc)
+                p[1].append(w if w < 255 else 255)
+        self.segments.append(SearchSegment(digest, first, len(questions)))
+        self._firsts.append(first)
+        self.n_docs += len(questions)
+
+    def _compact(self):
+        # renumber the docs of live segments and drop dead postings
+        shift = array("i")
+        segments, removed = [], 0
+        for s, seg in enumerate(self.segments):
+            if s in self.dead:
+                shift.append(-1)
+                removed += seg.count
+            else:
+                shift.append(removed)
+                segments.append(seg._replace(first=seg.first - removed))
+        firsts = self._firsts
+        for term in list(self.postings):
+            docs, weights = self.postings[term]
+            new_docs, new_weights = array("I"), array("B")
+            for doc, w in zip(docs, weights):
+                d = shift[bisect.bisect_right(firsts, doc) - 1]
+                if d >= 0:
+                    new_docs.append(doc - d)
+                    new_weights.append(w)
+            if new_docs:
+                self.postings[term] = (new_docs, new_weights)
+            else:
+                del self.postings[term]
+        self.segments = segments
+        self._firsts = [seg.first for seg in segments]
+        self.n_docs -= removed
+        self.dead = set()
+
+    # ---------- Querying ----------
+    def search(self, query, limit=SEARCH_LIMIT):
+        # [(category index, question number, score)] best first, for the synced bank
+        node = parse_query(query)
+        with self.lock:
+            scores = self._eval(node)
+            firsts, find = self._firsts, bisect.bisect_right
+            if self.dead:
+                dead = self.dead
+                scores = {doc: score for doc, score in scores.items() if find(firsts, doc) - 1 not in dead}
+            ranked = heapq.nlargest(limit, scores.items(), key=lambda kv: (kv[1], -kv[0])) \
+                if limit else sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))
+            hits = []
+            for doc, score in ranked:
+                seg = self.segments[find(firsts, doc) - 1]
+                hits.append((self.where[seg.digest], doc - seg.first, score))
+            return hits
+
+    def _matches(self, term, prefix):
+        # postings lists of a term, or of every term starting with it
+        if not prefix:
+            p = self.postings.get(term)
+            return [p] if p else []
+        if self._terms is None:
+            self._terms = sorted(self.postings)
+        terms = self._terms
+        i = bisect.bisect_left(terms, term)
+        out = []
+        while i < len(terms) and terms[i].startswith(term):
+            out.append(self.postings[terms[i]])
+            i += 1
+        return out
+
+    def _idf(self, docs):
+        return math.log(1 + self.n_docs / len(docs))
+
+    def _size(self, node):
+        # rough result size, to intersect starting from the smallest
+        if node[0] == "term":
+            return sum(len(d) for d, _ in self._matches(node[1], node[2]))
+        if node[0] == "and":
+            return min(self._size(n) for n in node[1])
+        if node[0] == "or":
+            return sum(self._size(n) for n in node[1])
+        return self.n_docs
+
+    def _eval(self, node):
+        # {doc: score}
+        kind = node[0]
+        if kind == "term":
+            scores = {}
+            for docs, weights in self._matches(node[1], node[2]):
+                idf = self._idf(docs)
+                if not scores:
+                    scores = dict(zip(docs, [w * idf for w in weights]))
+                    continue
+                for doc, w in zip(docs, weights):
+                    scores[doc] = scores.get(doc, 0.0) + w * idf
+            return scores
+        if kind == "or":
+            parts = sorted((self._eval(n) for n in node[1]), key=len, reverse=True)
+            scores = parts[0]
+            for other in parts[1:]:
+                for doc, score in other.items():
+                    scores[doc] = scores.get(doc, 0.0) + score
+            return scores
+        if kind == "not":
+            excluded = self._eval(node[1])
+            return {doc: 0.0 for doc in range(self.n_docs) if doc not in excluded}
+        # and: start from the smallest operand and narrow it down
+        include = [n for n in node[1] if n[0] != "not"]
+        exclude = [n[1] for n in node[1] if n[0] == "not"]
+        if not include:
+            return self._eval(("not", ("or", exclude)))
+        include.sort(key=self._size)
+        scores = self._eval(include[0])
+        for n in include[1:]:
+            if not scores:
+                break
+            matches = self._matches(n[1], n[2]) if n[0] == "term" else None
+            if matches is not None and len(matches) == 1:
+                scores = self._and_postings(scores, *matches[0])
+            else:
+                other = self._eval(n)
+                scores = {doc: score + other[doc] for doc, score in scores.items() if doc in other}
+        for n in exclude:
+            if not scores:
+                break
+            if n[0] == "term":
+                for docs, _ in self._matches(n[1], n[2]):
+                    for doc in scores.keys() & docs:
+                        del scores[doc]
+            else:
+                other = self._eval(n)
+                scores = {doc: score for doc, score in scores.items() if doc not in other}
+        return scores
+
+    def _and_postings(self, scores, docs, weights):
+        # scores restricted to docs, without building a dict for a long postings list
+        idf = self._idf(docs)
+        out = {}
+        if len(scores) * 8 < len(docs):
+            find = bisect.bisect_left
+            n = len(docs)
+            for doc, score in scores.items():
+                i = find(docs, doc)
+                if i < n and docs[i] == doc:
+                    out[doc] = score + weights[i] * idf
+        else:
+            for doc, w in zip(docs, weights):
+                score = scores.get(doc)
+                if score is not None:
+                    out[doc] = score + w * idf
+        return out
+
+    # ---------- Persistence ----------
+    def save(self, path):
+        with self.lock:
+            terms = sorted(self.postings)
+            blob = "\n".join(terms).encode("utf-8")
+            offsets = array("Q", [0])
+            docs, weights = array("I"), array("B")
+            for t in terms:
+                d, w = self.postings[t]
+                docs.extend(d)
+                weights.extend(w)
+                offsets.append(len(docs))
+            segments = b"".join(_INDEX_SEG.pack(seg.digest, seg.first, seg.count, s in self.dead)
+                                for s, seg in enumerate(self.segments))
+        if sys.byteorder != "little":
+            offsets.byteswap()
+            docs.byteswap()
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(_INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, len(self.segments), len(terms),
+                                       len(blob), len(docs)))
+            f.write(segments)
+            f.write(blob)
+            f.write(offsets.tobytes())
+            f.write(docs.tobytes())
+            f.write(weights.tobytes())
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        if len(data) < _INDEX_HEADER.size:
+            raise ValueError(f"{path}: not a search index")
+        magic, version, n_segs, n_terms, blob_len, n_postings = _INDEX_HEADER.unpack_from(data)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            raise ValueError(f"{path}: not a search index (or an old version)")
+        pos = _INDEX_HEADER.size
+        index = cls()
+        for digest, first, count, dead in _INDEX_SEG.iter_unpack(data[pos:pos + n_segs * _INDEX_SEG.size]):
+            if dead:
+                index.dead.add(len(index.segments))
+            index.segments.append(SearchSegment(digest, first, count))
+            index._firsts.append(first)
+            index.n_docs = first + count
+        pos += n_segs * _INDEX_SEG.size
+        terms = data[pos:pos + blob_len].decode("utf-8").split("\n") if n_terms else []
+        pos += blob_len
+        offsets, docs, weights = array("Q"), array("I"), array("B")
+        offsets.frombytes(data[pos:pos + (n_terms + 1) * 8])
+        pos += (n_terms + 1) * 8
+        docs.frombytes(data[pos:pos + n_postings * 4])
+        pos += n_postings * 4
+        weights.frombytes(data[pos:pos + n_postings])
+        if len(terms) != n_terms or len(weights) != n_postings:
+            raise ValueError(f"{path}: truncated search index")
+        if sys.byteorder != "little":
+            offsets.byteswap()
+            docs.byteswap()
+        index.postings = {t: (docs[offsets[i]:offsets[i + 1]], weights[offsets[i]:offsets[i + 1]])
+                          for i, t in enumerate(terms)}
+        return index
+
+
+def open_search_index(bank, json_path):
+    # the saved index brought up to date with bank (built from scratch if missing)
+    path = search_index_path(json_path)
+    try:
+        index = SearchIndex.load(path)
+    except (OSError, ValueError):
+        index = SearchIndex()
+    if index.sync(bank) != (0, 0) or not os.path.exists(path):
+        try:
+            index.save(path)
+        except OSError:
+            pass  # read-only location: rebuilt next time
+    return index
+
+
+def search_question_set(bank, picks, name):
+    # the picked (category index, question number) pairs as one QuestionSet;
+    # its digest covers the categories' content and the picks
+    by_cat = {}
+    for idx, n in picks:
+        by_cat.setdefault(idx, []).append(n)
+    found = {}
+    for idx, ns in by_cat.items():
+        base = QUESTION_CACHE.peek(bank, idx)
+        if base is not None:
+            found.update(((idx, n), base[n]) for n in ns)
+        elif isinstance(bank, CompiledQuestionBank):
+            found.update(((idx, n), Question.from_raw(bank.get_question(idx, n))) for n in ns)
+        else:
+            raw = bank.load_category(idx).get("questions", [])
+            found.update(((idx, n), Question.from_raw(raw[n])) for n in ns)
+    h = hashlib.blake2b(digest_size=16)
+    for idx, n in picks:
+        h.update(bank.category_digest(idx))
+        h.update(n.to_bytes(4, "little"))
+    qs = QuestionSet(found[p] for p in picks)
+    qs.digest = h.digest()
+    qs.category = name
+    return qs
+
+
+# ----------------- Sampling -----------------
+# A quiz is k questions drawn from a category plus an option order for each.
+# Draws are O(k) and come from random.Random(seed), so (category, seed, k)
+# is enough to rebuild exactly the same quiz later.
+PERMUTATIONS_4 = tuple(itertools.permutations(range(4)))  # option orders by id
+
+
+def sample_indices(n, k, rng):
+    # k distinct indices out of range(n) in random order: a partial
+    # Fisher-Yates shuffle that records only the swapped slots
+    k = min(k, n)
+    out = array("I")
+    swaps = {}
+    for i in range(k):
+        j = rng.randrange(i, n)
+        out.append(swaps.get(j, j))
+        swaps[j] = swaps.get(i, i)
+    return out
+
+
+def sample_stratified(strata, k, rng):
+    # k indices spread over the strata in proportion to their sizes
+    keys = sorted(strata, key=str)
+    n = sum(len(strata[key]) for key in keys)
+    k = min(k, n)
+    shares = [(k * len(strata[key]) / n) if n else 0 for key in keys]
+    counts = [int(x) for x in shares]
+    # hand out what rounding down left over, largest remainder first
+    for i in sorted(range(len(keys)), key=lambda i: counts[i] - shares[i])[:k - sum(counts)]:
+        counts[i] += 1
+    out = array("I")
+    for key, c in zip(keys, counts):
+        members = strata[key]
+        out.extend(members[i] for i in sample_indices(len(members), c, rng))
+    # mix the strata together
+    for i in range(len(out) - 1, 0, -1):
+        j = rng.randint(0, i)
+        out[i], out[j] = out[j], out[i]
+    return out
+
+
+def new_seed():
+    return random.randrange(1 << 32)
+
+
+class QuizQuestions:
+    # A quiz's question order over a shared QuestionSet: `order` holds indices
+    # into it and `option_perms` one byte per question naming an entry of
+    # PERMUTATIONS_4, so starting a quiz copies no question data.
+    __slots__ = ("base", "order", "option_perms", "seed")
+
+    def __init__(self, base, order, option_perms=None, seed=None):
+        self.base = base
+        self.order = order
+        self.option_perms = option_perms
+        self.seed = seed
+
+    @classmethod
+    def sample(cls, base, k=0, seed=None, shuffle=True, stratify=None):
+        # k=0 means the whole category; stratify names a Question field
+        n = len(base)
+        k = n if not k or k > n else k
+        if seed is None:
+            seed = new_seed()
+        if not shuffle:
+            return cls(base, array("I", range(k)), None, seed)
+        rng = random.Random(seed)
+        if stratify:
+            order = sample_stratified(base.strata(stratify), k, rng)
+        else:
+            order = sample_indices(n, k, rng)
+        perms = bytes(rng.randrange(len(PERMUTATIONS_4)) for _ in range(k))
+        return cls(base, order, perms, seed)
+
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, i):
+        if type(i) is slice:
+            return [self[k] for k in range(*i.indices(len(self.order)))]
+        if self.option_perms is None:
+            return self.base[self.order[i]]
+        return QuestionView(self.base, self.order[i], PERMUTATIONS_4[self.option_perms[i]])
+
+    def __iter__(self):
+        for i in range(len(self.order)):
+            yield self[i]
+
+    def answer_key(self):
+        # the correct answer per position, without building a view for each
+        strings, answer_ids = self.base.strings.strings, self.base.answer_ids
+        return [strings[answer_ids[j]] for j in self.order]
+
+
+class QuizSession:
+    __slots__ = ("questions", "answers", "index", "submitted")
+
+    def __init__(self, questions=()):
+        self.start(questions)
+
+    def start(self, questions):
+        self.questions = questions
+        self.answers = [""] * len(questions)
+        self.index = 0
+        self.submitted = False
+        return self
+
+    def __len__(self):
+        return len(self.questions)
+
+    def current(self):
+        return self.questions[self.index]
+
+    def is_last(self):
+        return self.index >= len(self.questions) - 1
+
+    def answer(self, option):
+        # record the option for the current question; None if left blank,
+        # otherwise whether it was correct
+        self.answers[self.index] = option
+        if not option:
+            return None
+        return option == self.questions[self.index].get("answer")
+
+    def next(self):
+        # False when already on the last question
+        if self.index < len(self.questions) - 1:
+            self.index += 1
+            return True
+        return False
+
+    def prev(self):
+        if self.index > 0:
+            self.index -= 1
+            return True
+        return False
+
+    def jump(self, index):
+        self.index = min(max(index, 0), max(len(self.questions) - 1, 0))
+
+    def timeout(self, option=""):
+        # keep whatever was selected when time ran out and move on
+        self.answers[self.index] = option
+        return self.next()
+
+    def score(self):
+        key = getattr(self.questions, "answer_key", None)
+        correct = key() if key is not None else (q.get("answer") for q in self.questions)
+        return sum(1 for a, c in zip(self.answers, correct) if a == c)
+
+    def submit(self):
+        self.submitted = True
+        return self.score(), asked_count(self.questions)
+
+
+def asked_count(questions):
+    # how many of a quiz's questions exist so far: a practice run only picks
+    # each one when it is reached, so a run submitted early is shorter
+    n = getattr(questions, "asked", None)
+    return len(questions) if n is None else n
+
+
+EXPORT_HEADER = ["Question", "Your Answer", "Correct Answer", "Correct?"]
+
+
+def write_export(path, questions, answers):
+    # one CSV row per question, as read back by quiz_analytics.read_export
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(EXPORT_HEADER)
+        for i, q in enumerate(questions):
+            your = answers[i] if i < len(answers) else ""
+            correct = q.get("answer")
+            w.writerow([q.get("question"), your, correct, "YES" if your == correct else "NO"])
+
+# ----------------- Practice scheduler -----------------
+# Practice mode picks each question after the previous answer is in:
+#   - ability and difficulty follow an Elo-style Rasch model: P(correct) =
+#     1 / (1 + e^(b - theta)), and each answer nudges the player's theta and
+#     the question's b by the surprise (outcome - P);
+#   - spaced repetition runs on the player's own clock (answers given): a miss
+#     is due again PRACTICE_RELEARN answers later, a hit doubles the gap.
+# Reviews that are due come first, from a min-heap on due time; otherwise a
+# new question near the player's level (P(correct) about PRACTICE_TARGET) is
+# taken from difficulty buckets. Both are O(log n) or better per pick.
+# State lives in practice.db: theta and clock per player, b per question and
+# one WITHOUT ROWID row per (player, question) seen, keyed by a 64-bit hash
+# of the question text and answer.
+_PRACTICE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    name TEXT PRIMARY KEY,
+    theta REAL NOT NULL,
+    clock INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS items (
+    qkey INTEGER PRIMARY KEY,
+    difficulty REAL NOT NULL,
+    answers INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS reviews (
+    player TEXT NOT NULL,
+    qkey INTEGER NOT NULL,
+    due INTEGER NOT NULL,
+    streak INTEGER NOT NULL,
+    seen INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    PRIMARY KEY (player, qkey)
+) WITHOUT ROWID;
+"""
+_DIFFICULTY_PRIOR = {"easy": -1.0, "medium": 0.0, "hard": 1.0}
+_BUCKET_WIDTH = 0.5
+_BUCKET_RANGE = 4.0   # difficulties are clamped to +-this for bucketing
+
+
+def question_key(q):
+    # stable across reloads and categories: same text and answer, same key
+    h = hashlib.blake2b(f"{q.question}\0{q.answer}".encode("utf-8"), digest_size=8)
+    return int.from_bytes(h.digest(), "little", signed=True)
+
+
+class PracticeStore:
+    def __init__(self, path=PRACTICE_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        import sqlite3
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_PRACTICE_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def player(self, name):
+        # (theta, clock); a new player starts at 0, 0
+        with self._lock:
+            row = self._db.execute("SELECT theta, clock FROM players WHERE name = ?", (name,)).fetchone()
+        return row or (0.0, 0)
+
+    def _by_key(self, sql, args, keys):
+        # {qkey: row[1:]} for keys, in chunks under SQLite's parameter limit
+        out = {}
+        keys = list(keys)
+        with self._lock:
+            for i in range(0, len(keys), 900):
+                chunk = keys[i:i + 900]
+                marks = ",".join("?" * len(chunk))
+                for row in self._db.execute(sql.format(marks), (*args, *chunk)):
+                    out[row[0]] = row[1:]
+        return out
+
+    def difficulties(self, keys):
+        return {k: r[0] for k, r in self._by_key("SELECT qkey, difficulty FROM items WHERE qkey IN ({})", (), keys).items()}
+
+    def reviews(self, name, keys):
+        # {qkey: (due, streak, seen, correct)}
+        return self._by_key("SELECT qkey, due, streak, seen, correct FROM reviews "
+                            "WHERE player = ? AND qkey IN ({})", (name,), keys)
+
+    def save(self, name, theta, clock, items, reviews):
+        # items: (qkey, difficulty, answers added); reviews: (qkey, due, streak, seen, correct)
+        with self._lock, self._db:
+            self._db.execute("INSERT INTO players (name, theta, clock) VALUES (?, ?, ?) "
+                             "ON CONFLICT(name) DO UPDATE SET theta = excluded.theta, clock = excluded.clock",
+                             (name, theta, clock))
+            self._db.executemany("INSERT INTO items (qkey, difficulty, answers) VALUES (?, ?, ?) "
+                                 "ON CONFLICT(qkey) DO UPDATE SET difficulty = excluded.difficulty, "
+                                 "answers = answers + excluded.answers", items)
+            self._db.executemany("INSERT OR REPLACE INTO reviews (player, qkey, due, streak, seen, correct) "
+                                 "VALUES (?, ?, ?, ?, ?, ?)", [(name, *r) for r in reviews])
+
+
+class PracticeScheduler:
+    # One player's practice over a QuestionSet. Per-question state is kept in
+    # arrays indexed like the set; `due` is -1 for never seen and -2 while a
+    # question is being asked.
+    def __init__(self, base, store, player, rng=None):
+        self.base = base
+        self.store = store
+        self.player = player
+        self.rng = rng or random.Random()
+        self.theta, self.clock = store.player(player)
+        self.keys = [question_key(q) for q in base]
+        known_b = store.difficulties(self.keys)
+        seen = store.reviews(player, self.keys)
+        n = len(base)
+        self.b = array("d", (known_b.get(k, _DIFFICULTY_PRIOR.get(q.difficulty.lower(), 0.0))
+                             for k, q in zip(self.keys, base)))
+        self.due = array("q", [-1]) * n
+        self.streak = array("H", [0]) * n
+        self.seen = array("I", [0]) * n
+        self.correct = array("I", [0]) * n
+        self.answers = array("I", [0]) * n   # this run only, added to items.answers on save
+        self.dirty = set()
+        self.heap = []
+        n_buckets = int(2 * _BUCKET_RANGE / _BUCKET_WIDTH) + 1
+        self.buckets = [[] for _ in range(n_buckets)]
+        order = list(range(n))
+        self.rng.shuffle(order)   # ties within a bucket come out in random order
+        for i in order:
+            r = seen.get(self.keys[i])
+            if r is None:
+                self.buckets[self._bucket(self.b[i])].append(i)
+            else:
+                self.due[i], self.streak[i], self.seen[i], self.correct[i] = r
+                self.heap.append((self.due[i], i))
+        heapq.heapify(self.heap)
+
+    def _bucket(self, b):
+        b = min(max(b, -_BUCKET_RANGE), _BUCKET_RANGE)
+        return int((b + _BUCKET_RANGE) / _BUCKET_WIDTH + 0.5)
+
+    def p_correct(self, i):
+        return 1.0 / (1.0 + math.exp(self.b[i] - self.theta))
+
+    def pick(self):
+        # index into base of the next question to ask
+        heap, due = self.heap, self.due
+        while heap and heap[0][0] <= self.clock:
+            d, i = heapq.heappop(heap)
+            if d == due[i]:
+                return self._asking(i)
+        # nothing due: a new question close to the player's level
+        target = self._bucket(self.theta - math.log(PRACTICE_TARGET / (1 - PRACTICE_TARGET)))
+        for step in range(len(self.buckets)):
+            for b in (target - step, target + step) if step else (target,):
+                if 0 <= b < len(self.buckets) and self.buckets[b]:
+                    return self._asking(self.buckets[b].pop())
+        # everything has been seen: the review that is due soonest
+        while heap:
+            d, i = heapq.heappop(heap)
+            if d == due[i]:
+                return self._asking(i)
+        # a tiny set where every question is being asked right now
+        return self.rng.randrange(len(self.base))
+
+    def _asking(self, i):
+        self.due[i] = -2
+        return i
+
+    def record(self, i, correct):
+        # update ability, difficulty and the review schedule after an answer
+        surprise = (1.0 if correct else 0.0) - self.p_correct(i)
+        self.theta += PRACTICE_K_PLAYER * surprise
+        self.b[i] -= PRACTICE_K_QUESTION * surprise
+        self.clock += 1
+        self.seen[i] += 1
+        self.answers[i] += 1
+        if correct:
+            self.correct[i] += 1
+            self.streak[i] = min(self.streak[i] + 1, 16)
+            gap = PRACTICE_INTERVAL << (self.streak[i] - 1)
+        else:
+            self.streak[i] = 0
+            gap = PRACTICE_RELEARN
+        self.due[i] = self.clock + gap
+        heapq.heappush(self.heap, (self.due[i], i))
+        self.dirty.add(i)
+
+    def save(self):
+        rows = sorted(self.dirty)
+        self.store.save(self.player, self.theta, self.clock,
+                        [(self.keys[i], self.b[i], self.answers[i]) for i in rows],
+                        [(self.keys[i], self.due[i], self.streak[i], self.seen[i], self.correct[i]) for i in rows])
+        for i in rows:
+            self.answers[i] = 0
+        self.dirty.clear()
+
+
+class PracticeQuestions:
+    # A practice run of `length` questions for QuizSession. Question i is
+    # picked the first time it is asked for, i.e. once the answer to i-1 is
+    # in; slices and iteration only return what has been picked so far (image
+    # prefetch, scoring, review and results must not pick ahead). The first
+    # answer to each position is what counts.
+    __slots__ = ("scheduler", "length", "picked", "recorded", "seed")
+
+    def __init__(self, scheduler, length):
+        self.scheduler = scheduler
+        self.length = length
+        self.picked = array("I")
+        self.recorded = set()
+        self.seed = None
+
+    @property
+    def base(self):
+        return self.scheduler.base
+
+    def __len__(self):
+        return self.length
+
+    @property
+    def asked(self):
+        return len(self.picked)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[k] for k in range(*i.indices(len(self.picked)))]
+        if i < 0:
+            i += self.length
+        if not 0 <= i < self.length:
+            raise IndexError("question index out of range")
+        while len(self.picked) <= i:
+            self.picked.append(self.scheduler.pick())
+        return self.scheduler.base[self.picked[i]]
+
+    def __iter__(self):
+        for i in range(len(self.picked)):
+            yield self[i]
+
+    def record(self, i, correct):
+        if i not in self.recorded and i < len(self.picked):
+            self.recorded.add(i)
+            self.scheduler.record(self.picked[i], correct)
+
+    def finish(self, answers):
+        # positions shown but never answered on the way count with their
+        # final answer; positions never reached are not recorded at all
+        for i, option in enumerate(answers[:len(self.picked)]):
+            self.record(i, option == self.scheduler.base[self.picked[i]].answer)
+        self.scheduler.save()
+
+# ----------------- Timer -----------------
+class JitterStats:
+    # how late each tick fired compared to when it was due (seconds)
+    __slots__ = ("count", "total", "total_sq", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.max = 0.0
+
+    def add(self, late):
+        self.count += 1
+        self.total += late
+        self.total_sq += late * late
+        if late > self.max:
+            self.max = late
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def stdev(self):
+        if self.count < 2:
+            return 0.0
+        m = self.mean()
+        return math.sqrt(max(self.total_sq / self.count - m * m, 0.0))
+
+    def summary(self):
+        return {"ticks": self.count, "mean_ms": self.mean() * 1000,
+                "stdev_ms": self.stdev() * 1000, "max_ms": self.max * 1000}
+
+
+class DeadlineTimer:
+    # Countdown against a time.monotonic() deadline. The time left is always
+    # deadline - now, so slow ticks or UI stalls never stretch a question, and
+    # at most one after() callback is pending: start/cancel drop the old one.
+    def __init__(self, widget, on_tick, on_expire, clock=time.monotonic):
+        self.widget = widget
+        self.on_tick = on_tick      # called with the whole seconds left
+        self.on_expire = on_expire
+        self.clock = clock
+        self.deadline = None
+        self.jitter = JitterStats()
+        self._handle = None
+        self._due = None
+
+    @property
+    def running(self):
+        return self.deadline is not None
+
+    def start(self, seconds):
+        self.cancel()
+        self.deadline = self.clock() + seconds
+        self._tick()
+
+    def cancel(self):
+        if self._handle is not None:
+            self.widget.after_cancel(self._handle)
+        self._handle = self._due = self.deadline = None
+
+    def remaining(self):
+        if self.deadline is None:
+            return 0.0
+        return max(self.deadline - self.clock(), 0.0)
+
+    def _tick(self):
+        now = self.clock()
+        if self._due is not None:
+            late = max(now - self._due, 0.0)
+            self.jitter.add(late)
+            if METRICS is not None:
+                METRICS.observe("quiz_timer_tick_late_seconds", late)
+        self._handle = self._due = None
+        left = self.deadline - now
+        if left <= 0:
+            self.deadline = None
+            self.on_tick(0)
+            self.on_expire()
+            return
+        shown = math.ceil(left)
+        self.on_tick(shown)
+        # wake up exactly when the displayed second changes
+        delay = left - (shown - 1)
+        self._due = now + delay
+        self._handle = self.widget.after(max(int(delay * 1000 + 0.5), 1), self._tick)
+
+# ----------------- Widgets -----------------
+class VirtualList(ttk.Frame):
+    # Scrollable list of fixed-height text rows. Only the rows in view have
+    # widgets; they are re-placed and re-labelled while scrolling, so opening
+    # a list costs the same for 5 or 5000 rows.
+    def __init__(self, master, count, row_text, on_click=None, lines=3, wraplength=700):
+        super().__init__(master)
+        self.count = count
+        self.row_text = row_text
+        self.on_click = on_click
+        self.wraplength = wraplength
+        self.row_height = tkfont.nametofont("TkDefaultFont").metrics("linespace") * (lines + 1)
+        self.offset = 0  # pixel offset of the top of the view
+        self.rows = []   # recycled labels
+        self.body = ttk.Frame(self)
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.body.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+        self.body.bind("<Configure>", lambda e: self.render())
+        self._bind_wheel(self.body)
+
+    def _bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", lambda e: self.yview("scroll", -1 if e.delta > 0 else 1, "units"))
+        widget.bind("<Button-4>", lambda e: self.yview("scroll", -1, "units"))
+        widget.bind("<Button-5>", lambda e: self.yview("scroll", 1, "units"))
+
+    def set_count(self, count):
+        self.count = count
+        self.render()
+
+    def yview(self, *args):
+        height = self.body.winfo_height()
+        if args[0] == "moveto":
+            self.offset = float(args[1]) * self.count * self.row_height
+        elif args[0] == "scroll":
+            step = self.row_height if args[2] == "units" else max(height - self.row_height, self.row_height)
+            self.offset += int(args[1]) * step
+        self.render()
+
+    def _click(self, lbl):
+        if self.on_click is not None:
+            self.on_click(lbl.row)
+
+    def render(self):
+        height = max(self.body.winfo_height(), 1)
+        total = self.count * self.row_height
+        self.offset = min(max(self.offset, 0), max(total - height, 0))
+        first = int(self.offset // self.row_height)
+        last = min(self.count, int((self.offset + height) // self.row_height) + 1)
+        while len(self.rows) < last - first:
+            lbl = ttk.Label(self.body, wraplength=self.wraplength, justify="left", anchor="nw")
+            lbl.bind("<Button-1>", lambda e, l=lbl: self._click(l))
+            self._bind_wheel(lbl)
+            self.rows.append(lbl)
+        for k, lbl in enumerate(self.rows):
+            row = first + k
+            if row < last:
+                lbl.row = row
+                lbl.configure(text=self.row_text(row))
+                lbl.place(x=0, y=row*self.row_height - self.offset, relwidth=1, height=self.row_height)
+            else:
+                lbl.place_forget()
+        if total > height:
+            self.scrollbar.set(self.offset / total, (self.offset + height) / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+
+def one_line(text, width=110):
+    text = " ".join(str(text).split())
+    return text if len(text) <= width else text[:width-1] + "…"
+
+# ----------------- Session journal -----------------
+# Every quiz event is appended to quiz_journal.jsonl as one JSON line:
+#   start    s, category, digest, seed, k, shuffle, stratify, ts
+#   answer   s, i, option          (also written for timeouts, with "timeout")
+#   nav      s, i
+#   end      s, score, total       or  abandon  s
+# A writer thread batches records and fsyncs once per JOURNAL_COMMIT_MS, so
+# the Tk thread only appends to a list. On launch, sessions without an end
+# are offered for resume: the quiz is rebuilt from (category, seed, k) and
+# the answers replayed. compact_journal keeps only what resuming needs.
+class SessionJournal:
+    def __init__(self, path=JOURNAL_PATH, commit_ms=JOURNAL_COMMIT_MS):
+        self.path = path
+        self.commit_s = commit_ms / 1000
+        self.appended = 0
+        self.durable = 0
+        self.commits = 0
+        self._pending = []
+        self._closed = False
+        self._cond = threading.Condition()
+        self._file = open(path, "ab")
+        self._thread = threading.Thread(target=self._run, name="journal", daemon=True)
+        self._thread.start()
+
+    def append(self, kind, session, **fields):
+        line = json.dumps({"t": kind, "s": session, **fields}, ensure_ascii=False, separators=(",", ":"))
+        with self._cond:
+            self._pending.append(line.encode("utf-8") + b"\n")
+            self.appended += 1
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                closing = self._closed
+            if not closing:
+                # group commit: let records arriving meanwhile share this fsync
+                time.sleep(self.commit_s)
+            with self._cond:
+                batch, self._pending = self._pending, []
+            try:
+                self._file.write(b"".join(batch))
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except OSError:
+                pass
+            with self._cond:
+                self.durable += len(batch)
+                self.commits += 1
+                self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        # wait until everything appended so far is on disk
+        with self._cond:
+            target = self.appended
+            return self._cond.wait_for(lambda: self.durable >= target, timeout)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        self._file.close()
+
+
+class ReplayedSession:
+    __slots__ = ("start", "answers", "index", "ended")
+
+    def __init__(self, start):
+        self.start = start
+        self.answers = {}
+        self.index = 0
+        self.ended = False
+
+
+def read_journal(path=JOURNAL_PATH):
+    # sessions by id, in the order they started; torn lines from a crash
+    # mid-write are skipped
+    sessions = {}
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return sessions
+    with f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            kind, sid = rec.get("t"), rec.get("s")
+            if kind == "start":
+                sessions[sid] = ReplayedSession(rec)
+                continue
+            state = sessions.get(sid)
+            if state is None:
+                continue
+            if kind == "answer":
+                state.answers[rec["i"]] = rec.get("option", "")
+                state.index = rec["i"]
+            elif kind == "nav":
+                state.index = rec["i"]
+            elif kind in ("end", "abandon"):
+                state.ended = True
+    return sessions
+
+
+def interrupted_sessions(path=JOURNAL_PATH):
+    return [s for s in read_journal(path).values() if not s.ended]
+
+
+def compact_journal(path=JOURNAL_PATH):
+    # rewrite the journal with just the unfinished sessions, one answer
+    # record per answered question; returns how many sessions were kept
+    keep = interrupted_sessions(path)
+    if not os.path.exists(path):
+        return 0
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        for state in keep:
+            sid = state.start["s"]
+            recs = [state.start]
+            recs += [{"t": "answer", "s": sid, "i": i, "option": o} for i, o in sorted(state.answers.items())]
+            recs.append({"t": "nav", "s": sid, "i": state.index})
+            for rec in recs:
+                f.write(json.dumps(rec, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return len(keep)
+
+
+def resume_questions(bank, start):
+    # rebuild a journalled quiz; None if its category is gone or changed
+    if start.get("mode") == "practice":
+        return None  # picked adaptively, nothing to rebuild from
+    if start.get("picks") is not None:
+        # a search quiz: the picked questions are journalled by category digest
+        where = {}
+        for i in range(len(bank)):
+            where.setdefault(bank.category_digest(i).hex(), i)
+        try:
+            base = search_question_set(bank, [(where[d], n) for d, n in start["picks"]], start.get("category"))
+        except (KeyError, IndexError, TypeError, ValueError):
+            return None
+        if base.digest.hex() != start.get("digest"):
+            return None
+        return None, QuizQuestions.sample(base, start.get("k", 0), start.get("seed"),
+                                          start.get("shuffle", True), start.get("stratify"))
+    names = bank.names()
+    for idx, name in enumerate(names):
+        if name != start.get("category"):
+            continue
+        base = QUESTION_CACHE.get(bank, idx)
+        if base.digest.hex() != start.get("digest"):
+            continue
+        return idx, QuizQuestions.sample(base, start.get("k", 0), start.get("seed"),
+                                         start.get("shuffle", True), start.get("stratify"))
+    return None
+
+# ----------------- Startup profile -----------------
+# `python quiz1111.py --startup-profile` times the init phases of the app and
+# the imports of this module, and prints both once the window is up.
+STARTUP = None
+
+
+class StartupProfile:
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.marks = []
+        self.reported = False
+
+    def mark(self, phase):
+        self.marks.append((phase, time.perf_counter()))
+
+    def has(self, phase):
+        return any(p == phase for p, _ in self.marks)
+
+    @staticmethod
+    def import_times(module=None, top=8):
+        # (total_us, [(cumulative_us, name), ...]) from a fresh `python -X importtime`
+        import subprocess
+        module = module or os.path.splitext(os.path.basename(__file__))[0]
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                              capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        total, children = 0, []
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            parts = line[len("import time:"):].split("|")
+            try:
+                cumulative = int(parts[1])
+            except ValueError:
+                continue
+            name = parts[2].rstrip()
+            depth = (len(name) - len(name.lstrip())) // 2
+            if depth == 0 and name.strip() == module:
+                total = cumulative
+            elif depth == 1:
+                children.append((cumulative, name.strip()))
+        children.sort(reverse=True)
+        return total, children[:top]
+
+    def report(self, out=sys.stdout):
+        self.reported = True
+        print("Startup profile", file=out)
+        print("  init phases (ms since main):", file=out)
+        prev = self.t0
+        for phase, t in sorted(self.marks, key=lambda m: m[1]):
+            print(f"    {phase:<18} {(t-self.t0)*1000:8.1f}  (+{(t-prev)*1000:.1f})", file=out)
+            prev = t
+        total, children = self.import_times()
+        print(f"  import time of this module: {total/1000:.1f} ms", file=out)
+        for cumulative, name in children:
+            print(f"    {name:<18} {cumulative/1000:8.1f}", file=out)
+        out.flush()
+
+
+def startup_mark(phase):
+    if STARTUP is not None:
+        STARTUP.mark(phase)
 
 # ----------------- Main App -----------------
 class QuizApp:
@@ -61,13 +2688,29 @@ class QuizApp:
 
         # state
         self.categories = []
-        self.questions = []       # flattened questions of chosen category (list of dicts)
-        self.q_index = 0
-        self.user_answers = []    # user's chosen option strings per question
+        self.session = QuizSession()  # questions, answers and position of the current quiz
         self.time_per_question = TIME_PER_QUESTION
-        self.time_left = self.time_per_question
-        self.timer_running = False
+        self.timer = DeadlineTimer(master, self.update_timer, self.time_up)
         self.current_image = None
+        self.images = ImagePrefetcher()
+        self.session_id = None    # journal id of the running quiz
+        self.journal = None
+        self.interrupted = []
+        try:
+            self.interrupted = interrupted_sessions(JOURNAL_PATH)
+            compact_journal(JOURNAL_PATH)
+            self.journal = SessionJournal(JOURNAL_PATH)
+        except OSError:
+            self.journal = None
+        self.category_name = ""
+        self.leaderboard_category = ""   # category_name, or "" for search and practice runs
+        self._leaderboard = None
+        self._practice = None
+        self._results = None
+        self.player_name = None
+        self.review_win = None    # kept (hidden) while jumping back to a question
+        self.review_list = None
+        SOUND_BANK.preload_in_background()
 
         # GUI frames
         self.header = ttk.Frame(master, padding=10)
@@ -129,6 +2772,14 @@ class QuizApp:
         self.time_spin.pack(anchor="w", pady=(0,8))
         self.shuffle_var = tk.BooleanVar(value=True)
         ttk.Checkbutton(self.right, text="Shuffle Questions & Options", variable=self.shuffle_var).pack(anchor="w", pady=(0,8))
+        ttk.Label(self.right, text="Questions per quiz (0 = all):").pack(anchor="w")
+        self.count_spin = ttk.Spinbox(self.right, from_=0, to=10000, increment=5, width=8)
+        self.count_spin.set("0")
+        self.count_spin.pack(anchor="w", pady=(0,8))
+        ttk.Label(self.right, text="Balance by:").pack(anchor="w")
+        self.stratify_var = tk.StringVar(value="none")
+        ttk.Combobox(self.right, textvariable=self.stratify_var, state="readonly", width=10,
+                     values=["none", "tag", "difficulty"]).pack(anchor="w", pady=(0,8))
 
         ttk.Separator(self.right).pack(fill="x", pady=8)
         ttk.Button(self.right, text="Export Result (CSV)", command=self.export_result).pack(fill="x", pady=6)
@@ -140,14 +2791,229 @@ class QuizApp:
         self.progressbar = ttk.Progressbar(self.footer_left, orient="horizontal", mode="determinate")
         self.progressbar.pack(fill="x", expand=True, padx=6, pady=6)
 
-        # Load JSON and open category selector
-        try:
-            self.categories = load_questions_from_json(QUESTIONS_JSON)
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not load {QUESTIONS_JSON}: {e}")
-            self.categories = []
+        startup_mark("widgets built")
 
+        # Index the bank on a worker thread; the category selector opens right
+        # away and fills in as categories are found
+        self.bank_stamp = None
+        self.bank_loading = False
+        self.bank_reloading = False
+        self.category_labels = []
+        self.selector = self.selector_list = self.selector_start = None
+        self.watcher = None
+        self.bank_changed = threading.Event()
+        self.search_index = None
+        self._index_lock = threading.Lock()
+        self.load_bank_in_background()
         self.open_category_selector()
+        self.master.after_idle(self._first_idle)
+        self.metrics_overlay = None
+        if METRICS is not None:
+            METRICS.gauge("quiz_image_cache_hit_ratio", self.images.cache.hit_rate)
+            METRICS.gauge("quiz_image_cache_bytes", lambda: self.images.cache.nbytes)
+            self.master.bind("<F12>", self.toggle_metrics_overlay)
+            self.master.after(METRICS_DUMP_MS, self._dump_metrics)
+
+    def _first_idle(self):
+        startup_mark("window idle")
+        self._maybe_report_startup()
+
+    def _maybe_report_startup(self):
+        if STARTUP is not None and not STARTUP.reported and not self.bank_loading and STARTUP.has("window idle"):
+            STARTUP.report()
+
+    # ---------- Metrics ----------
+    def _dump_metrics(self):
+        try:
+            METRICS.dump()
+        except OSError:
+            pass
+        self.master.after(METRICS_DUMP_MS, self._dump_metrics)
+
+    def toggle_metrics_overlay(self, _=None):
+        if self.metrics_overlay is not None:
+            self.master.after_cancel(self._overlay_after)
+            self.metrics_overlay.destroy()
+            self.metrics_overlay = None
+            return
+        self.metrics_overlay = tk.Label(self.master, justify="left", anchor="nw", font=("Courier", 9),
+                                        bg="#000000", fg="#7CFC00")
+        self.metrics_overlay.place(relx=1.0, rely=1.0, anchor="se")
+        self._refresh_metrics_overlay()
+
+    def _refresh_metrics_overlay(self):
+        self.metrics_overlay.config(text="\n".join(METRICS.summary_lines()) or "no samples yet")
+        self.metrics_overlay.lift()
+        self._overlay_after = self.master.after(1000, self._refresh_metrics_overlay)
+
+    @staticmethod
+    def _category_label(i, entry):
+        name = entry.name if entry.name is not None else f"Category {i+1}"
+        return f"{name} ({entry.count})"
+
+    def load_bank_in_background(self):
+        self.bank_stamp = file_stamp(QUESTIONS_JSON)
+        self.bank_loading = True
+        self.categories = []
+        self.category_labels = []
+        results = queue.Queue()
+
+        def work():
+            try:
+                bank = load_questions_from_json(QUESTIONS_JSON, on_entry=lambda e: results.put(("entry", e)))
+                results.put(("done", bank))
+            except Exception as e:
+                results.put(("error", e))
+
+        threading.Thread(target=work, name="bank-index", daemon=True).start()
+        self.master.after(BANK_POLL_MS, self._poll_bank, results)
+
+    def _poll_bank(self, results):
+        for _ in range(1000):
+            try:
+                kind, item = results.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "entry":
+                label = self._category_label(len(self.category_labels), item)
+                self.category_labels.append(label)
+                if self._selector_open():
+                    self.selector_list.insert("end", label)
+                    if len(self.category_labels) == 1:
+                        self.selector_list.selection_set(0)
+            elif kind == "done":
+                self._bank_ready(item)
+                return
+            else:
+                self._bank_failed(item)
+                return
+        self.master.after(BANK_POLL_MS, self._poll_bank, results)
+
+    def _bank_ready(self, bank):
+        self.bank_loading = False
+        self.categories = bank
+        startup_mark("bank indexed")
+        labels = [self._category_label(i, e) for i, e in enumerate(bank.entries)]
+        if self._selector_open():
+            if labels != self.category_labels:
+                self.selector_list.delete(0, "end")
+                for label in labels:
+                    self.selector_list.insert("end", label)
+                self.selector_list.selection_set(0)
+            self.selector.title("Select Category")
+            self.selector_start.state(["!disabled"])
+        self.category_labels = labels
+        if not bank:
+            self._close_selector()
+            messagebox.showerror("No Data", "No categories/questions available in JSON.")
+        self._maybe_report_startup()
+        self.watch_bank()
+        self.update_search_index()
+        if bank and self.interrupted:
+            self.offer_resume()
+
+    def _bank_failed(self, error):
+        self.bank_loading = False
+        self.categories = []
+        self._close_selector()
+        messagebox.showerror("Error", f"Could not load {QUESTIONS_JSON}: {error}")
+        self._maybe_report_startup()
+        self.watch_bank()
+
+    def _selector_open(self):
+        return self.selector is not None and self.selector.winfo_exists()
+
+    def _close_selector(self):
+        if self._selector_open():
+            self.selector.destroy()
+        self.selector = self.selector_list = self.selector_start = None
+
+    def watch_bank(self):
+        if self.watcher is None:
+            self.watcher = FileWatcher(QUESTIONS_JSON, self.bank_changed.set).start()
+            self.master.after(WATCH_CHECK_MS, self._check_bank_changed)
+
+    def _check_bank_changed(self):
+        if self.bank_changed.is_set():
+            self.bank_changed.clear()
+            self.reload_bank_if_changed()
+        self.master.after(WATCH_CHECK_MS, self._check_bank_changed)
+
+    def reload_bank_if_changed(self):
+        # questions.json was edited: re-index just the edited part on a worker
+        # thread, then (_poll_reload) keep the normalised categories that didn't
+        # change and update the selector in place. A running quiz keeps the
+        # questions it started with.
+        stamp = file_stamp(QUESTIONS_JSON)
+        if self.bank_loading or self.bank_reloading or stamp is None or stamp == self.bank_stamp:
+            return
+        self.bank_reloading = True
+        previous = self.categories
+        results = queue.Queue()
+
+        def work():
+            try:
+                results.put(("done", reload_questions(previous, QUESTIONS_JSON)))
+            except Exception as e:
+                results.put(("error", e))
+
+        threading.Thread(target=work, name="bank-reindex", daemon=True).start()
+        self.master.after(BANK_POLL_MS, self._poll_reload, results, stamp)
+
+    def _poll_reload(self, results, stamp):
+        try:
+            kind, item = results.get_nowait()
+        except queue.Empty:
+            self.master.after(BANK_POLL_MS, self._poll_reload, results, stamp)
+            return
+        self.bank_reloading = False
+        if kind == "done":
+            self._bank_reloaded(item, stamp)
+        # else half-written or invalid; the next save triggers another try
+        if file_stamp(QUESTIONS_JSON) != stamp:
+            self.reload_bank_if_changed()   # saved again while we were indexing
+
+    def _bank_reloaded(self, bank, stamp):
+        self.bank_stamp = stamp
+        self.categories = bank
+        QUESTION_CACHE.refresh(bank)
+        labels = [self._category_label(i, e) for i, e in enumerate(bank.entries)]
+        if self._selector_open():
+            listbox, old = self.selector_list, self.category_labels
+            sel = listbox.curselection()
+            for i in range(min(len(old), len(labels))):
+                if old[i] != labels[i]:
+                    listbox.delete(i)
+                    listbox.insert(i, labels[i])
+            if len(old) > len(labels):
+                listbox.delete(len(labels), "end")
+            for label in labels[len(old):]:
+                listbox.insert("end", label)
+            if labels:
+                listbox.selection_set(min(sel[0], len(labels) - 1) if sel else 0)
+        self.category_labels = labels
+        self.update_search_index()
+
+    def update_search_index(self):
+        # open/build the search index for the current bank on a worker thread;
+        # after an edit only the changed categories are tokenised
+        bank = self.categories
+        if not bank:
+            return
+
+        def work():
+            with self._index_lock:
+                if bank is not self.categories:
+                    return  # superseded by a newer reload
+                try:
+                    if self.search_index is None:
+                        self.search_index = open_search_index(bank, QUESTIONS_JSON)
+                    elif self.search_index.sync(bank) != (0, 0):
+                        self.search_index.save(search_index_path(QUESTIONS_JSON))
+                except Exception:
+                    pass  # search stays unavailable; categories still work
+
+        threading.Thread(target=work, name="search-index", daemon=True).start()
 
     # ---------- Styling ----------
     def setup_styles(self):
@@ -183,20 +3049,49 @@ class QuizApp:
             self.apply_light_theme()
 
     # ---------- Category selection ----------
+    def start_quiz(self, base, name, view=None, **fields):
+        # sampling only picks indices over the cached questions
+        stratify = self.stratify_var.get()
+        stratify = None if stratify == "none" else stratify
+        if view is None:
+            view = QuizQuestions.sample(base, self.question_count(), shuffle=self.shuffle_var.get(),
+                                        stratify=stratify)
+        self.category_name = name
+        self.leaderboard_category = self._leaderboard_category(name, fields)
+        self.session.start(view)
+        self.session_id = secrets.token_hex(6)
+        self.log("start", category=name, digest=base.digest.hex(), seed=view.seed,
+                 k=len(view), shuffle=self.shuffle_var.get(), stratify=stratify,
+                 ts=datetime.now().isoformat(), **fields)
+        self._close_selector()
+        self.load_question()
+
+    @staticmethod
+    def _leaderboard_category(name, fields):
+        # search and practice runs are ranked overall but don't become
+        # categories of their own in the leaderboard filter
+        if fields.get("mode") == "practice" or "query" in fields:
+            return ""
+        return name
+
     def open_category_selector(self):
         # Build a simple popup to choose category
-        if not self.categories:
+        if not self.bank_loading and not self.categories:
             messagebox.showerror("No Data", "No categories/questions available in JSON.")
             return
+        if self._selector_open():
+            self.selector.lift()
+            return
         top = tk.Toplevel(self.master)
-        top.title("Select Category")
-        top.geometry("420x320")
+        top.title("Select Category (loading…)" if self.bank_loading else "Select Category")
+        top.geometry("420x380")
         ttk.Label(top, text="Choose category to start", font=("Helvetica", 14, "bold")).pack(pady=12)
         listbox = tk.Listbox(top, height=8)
         listbox.pack(fill="both", expand=True, padx=12)
-        for i, cat in enumerate(self.categories):
-            listbox.insert("end", cat.get("category", f"Category {i+1}"))
-        listbox.selection_set(0)
+        for label in self.category_labels:
+            listbox.insert("end", label)
+        if self.category_labels:
+            listbox.selection_set(0)
 
         def start_for_selected():
             sel = listbox.curselection()
@@ -204,44 +3099,129 @@ class QuizApp:
                 messagebox.showwarning("Select", "Please select a category.")
                 return
             idx = sel[0]
-            cat_obj = self.categories[idx]
-            # Flatten and prepare questions
-            qs = cat_obj.get("questions", [])
-            # validate
-            qlist = []
-            for q in qs:
-                # ensure options exist and answer in them
-                options = q.get("options", [])
-                if q.get("answer") not in options:
-                    # place correct answer first then extend unique options
-                    if q.get("answer"):
-                        options = [q["answer"]] + [o for o in options if o != q["answer"]]
-                # pad options to at least 2 (UI expects up to 4)
-                while len(options) < 2:
-                    options.append("")
-                # truncate/pad to 4
-                options = options[:4] + ([""] * max(0, 4 - len(options)))
-                qlist.append({
-                    "question": q.get("question", ""),
-                    "options": options,
-                    "answer": q.get("answer", ""),
-                    "image": q.get("image", "")
-                })
-            # shuffle questions if needed (do at start)
-            if self.shuffle_var.get():
-                random.shuffle(qlist)
-                # shuffle options but keep correct mapping
-                for q in qlist:
-                    opts = q["options"].copy()
-                    random.shuffle(opts)
-                    q["options"] = opts
-            self.questions = qlist
-            self.user_answers = [""] * len(self.questions)
-            self.q_index = 0
-            top.destroy()
-            self.load_question()
+            try:
+                base = QUESTION_CACHE.get(self.categories, idx)
+            except Exception as e:
+                messagebox.showerror("Error", f"Could not load category: {e}")
+                return
+            self.start_quiz(base, self.categories.names()[idx])
 
-        ttk.Button(top, text="Start", command=start_for_selected).pack(pady=8)
+        def practice_selected():
+            # adaptive run over the category for one player (see PracticeScheduler)
+            sel = listbox.curselection()
+            if not sel:
+                messagebox.showwarning("Select", "Please select a category.")
+                return
+            player = simpledialog.askstring("Practice", "Practising as:", initialvalue=self.player_name or "",
+                                            parent=top)
+            if not player:
+                return
+            try:
+                base = QUESTION_CACHE.get(self.categories, sel[0])
+                if not len(base):
+                    messagebox.showinfo("Practice", "This category has no questions.")
+                    return
+                scheduler = PracticeScheduler(base, self.practice_store(), player)
+            except Exception as e:
+                messagebox.showerror("Error", f"Could not start practice: {e}")
+                return
+            self.player_name = player
+            view = PracticeQuestions(scheduler, self.question_count() or PRACTICE_LENGTH)
+            name = self.categories.names()[sel[0]]
+            self.start_quiz(base, f"Practice: {name}", view=view, mode="practice", player=player)
+
+        def start_search():
+            # a quiz drawn from the best matches of a keyword search over all categories
+            query = query_var.get().strip()
+            index = self.search_index
+            if index is None or index.bank is not self.categories:
+                messagebox.showinfo("Search", "The search index is still being built, try again in a moment.")
+                return
+            try:
+                hits = index.search(query)
+            except ValueError as e:
+                messagebox.showwarning("Search", str(e))
+                return
+            if not hits:
+                messagebox.showinfo("Search", f"No questions match {query!r}.")
+                return
+            picks = [(i, n) for i, n, _ in hits]
+            try:
+                base = search_question_set(self.categories, picks, f"Search: {query}")
+            except Exception as e:
+                messagebox.showerror("Error", f"Could not load questions: {e}")
+                return
+            self.start_quiz(base, base.category, query=query,
+                            picks=[[self.categories.category_digest(i).hex(), n] for i, n in picks])
+
+        search_row = ttk.Frame(top)
+        search_row.pack(fill="x", padx=12, pady=(8, 0))
+        query_var = tk.StringVar()
+        query_entry = ttk.Entry(search_row, textvariable=query_var)
+        query_entry.pack(side="left", fill="x", expand=True)
+        query_entry.bind("<Return>", lambda e: start_search())
+        ttk.Button(search_row, text="Search", command=start_search).pack(side="left", padx=(6, 0))
+
+        buttons = ttk.Frame(top)
+        buttons.pack(pady=8)
+        start_btn = ttk.Button(buttons, text="Start", command=start_for_selected)
+        start_btn.pack(side="left", padx=4)
+        ttk.Button(buttons, text="Practice", command=practice_selected).pack(side="left", padx=4)
+        if self.bank_loading:
+            start_btn.state(["disabled"])
+        self.selector, self.selector_list, self.selector_start = top, listbox, start_btn
+        startup_mark("selector shown")
+
+    # ---------- Journal ----------
+    def log(self, kind, **fields):
+        if self.journal is not None and self.session_id is not None:
+            self.journal.append(kind, self.session_id, **fields)
+
+    def offer_resume(self):
+        # most recent unfinished quiz first; the rest are dropped
+        pending, self.interrupted = self.interrupted[::-1], []
+        for state in pending:
+            start = state.start
+            found = resume_questions(self.categories, start)
+            if found is not None and messagebox.askyesno(
+                    "Resume", f"Resume the interrupted {start.get('category')} quiz "
+                              f"({len(state.answers)} answered, started {start.get('ts', '')[:16]})?"):
+                _, view = found
+                self._close_selector()
+                self.category_name = start.get("category")
+                self.leaderboard_category = self._leaderboard_category(self.category_name, start)
+                self.session.start(view)
+                for i, option in state.answers.items():
+                    if 0 <= i < len(view):
+                        self.session.answers[i] = option
+                self.session.jump(state.index)
+                self.session_id = start["s"]
+                for other in pending:
+                    if other is not state and self.journal is not None:
+                        self.journal.append("abandon", other.start["s"])
+                self.load_question()
+                return
+            if self.journal is not None:
+                self.journal.append("abandon", start["s"])
+
+    # views over the session state
+    @property
+    def questions(self):
+        return self.session.questions
+
+    @property
+    def user_answers(self):
+        return self.session.answers
+
+    @property
+    def q_index(self):
+        return self.session.index
+
+    def question_count(self):
+        try:
+            return max(int(self.count_spin.get()), 0)
+        except ValueError:
+            return 0
 
     # ---------- Time settings ----------
     def update_time(self):
@@ -254,16 +3234,12 @@ class QuizApp:
         self.time_per_question = v
 
     # ---------- Load & display a question ----------
+    @timed("quiz_load_question_seconds")
     def load_question(self):
         if not self.questions:
             self.question_text.set("No questions loaded.")
             return
-        if self.q_index < 0:
-            self.q_index = 0
-        if self.q_index >= len(self.questions):
-            self.open_review()
-            return
-        q = self.questions[self.q_index]
+        q = self.session.current()
         self.question_text.set(f"Q{self.q_index+1}. {q.get('question','')}")
         # options
         opts = q.get("options", [])
@@ -276,8 +3252,10 @@ class QuizApp:
         # restore previous selection
         prev = self.user_answers[self.q_index] if self.q_index < len(self.user_answers) else ""
         self.option_var.set(prev)
-        # image
+        # image (and warm the cache for the next few questions)
         self.show_image(q.get("image",""))
+        ahead = self.questions[self.q_index+1:self.q_index+1+IMAGE_PREFETCH_AHEAD]
+        self.images.prefetch(nq.get("image","") for nq in ahead)
         # progress text
         self.progress_var.set(f"Question {self.q_index+1} / {len(self.questions)}")
         # prev/next button state
@@ -293,26 +3271,24 @@ class QuizApp:
         # reset feedback
         self.feedback_var.set("")
         # start timer
-        self.timer_running = False
-        self.time_left = self.time_per_question
         self.progressbar['maximum'] = self.time_per_question
         self.progressbar['value'] = self.time_per_question
         self.start_timer()
 
+    @timed("quiz_show_image_seconds")
     def show_image(self, path):
         if not path:
             self.image_label.config(image="", text="")
             self.current_image = None
             return
-        if not Image or not ImageTk:
+        if not load_pil() or not ImageTk:
             self.image_label.config(text=f"(Pillow not installed) Image: {path}", image="")
             return
         if not os.path.isfile(path):
             self.image_label.config(text=f"(missing) {path}", image="")
             return
         try:
-            img = Image.open(path)
-            img.thumbnail(IMAGE_MAX_SIZE)
+            img = self.images.get(path)
             self.current_image = ImageTk.PhotoImage(img)
             self.image_label.config(image=self.current_image, text="")
         except Exception as e:
@@ -320,35 +3296,27 @@ class QuizApp:
 
     # ---------- Timer ----------
     def start_timer(self):
-        self.timer_running = True
-        self.update_timer()
+        self.timer.start(self.time_per_question)
 
     def stop_timer(self):
-        self.timer_running = False
+        self.timer.cancel()
 
-    def update_timer(self):
-        if not self.timer_running:
-            return
+    def update_timer(self, time_left):
         # update text and progressbar
-        self.timer_var.set(f"Time Left: {self.time_left}s")
-        self.progressbar['value'] = self.time_left
-        if self.time_left <= 0:
-            self.timer_running = False
-            self.feedback_var.set("⏳ Time Up!")
-            play_sound("timeout")
-            self.handle_timeout()
-            return
-        self.time_left -= 1
-        # schedule next tick
-        self.master.after(1000, self.update_timer)
+        self.timer_var.set(f"Time Left: {time_left}s")
+        self.progressbar['value'] = time_left
+
+    def time_up(self):
+        self.feedback_var.set("⏳ Time Up!")
+        play_sound("timeout")
+        self.handle_timeout()
 
     def handle_timeout(self):
-        # save current selected (may be empty)
-        sel = self.option_var.get()
-        self.user_answers[self.q_index] = sel
-        # auto move
-        if self.q_index < len(self.questions)-1:
-            self.q_index += 1
+        # save current selected (may be empty) and auto move
+        self.log("answer", i=self.session.index, option=self.option_var.get(), timeout=True)
+        self.record_practice(self.option_var.get() == self.session.current().get("answer"))
+        if self.session.timeout(self.option_var.get()):
+            self.log("nav", i=self.session.index)
             self.load_question()
         else:
             self.open_review()
@@ -356,88 +3324,116 @@ class QuizApp:
     # ---------- Navigation ----------
     def next_pressed(self):
         self.stop_timer()
-        sel = self.option_var.get()
-        self.user_answers[self.q_index] = sel
         # immediate feedback
-        q = self.questions[self.q_index]
-        if sel:
-            if sel == q.get("answer"):
-                self.feedback_var.set("✅ Correct!")
-                play_sound("correct")
-            else:
-                self.feedback_var.set(f"❌ Incorrect. (Correct: {q.get('answer')})")
-                play_sound("wrong")
-        else:
+        correct = self.session.answer(self.option_var.get())
+        self.log("answer", i=self.session.index, option=self.option_var.get())
+        self.record_practice(bool(correct))
+        if correct:
+            self.feedback_var.set("✅ Correct!")
+            play_sound("correct")
+        elif correct is None:
             self.feedback_var.set("No answer selected.")
+        else:
+            self.feedback_var.set(f"❌ Incorrect. (Correct: {self.session.current().get('answer')})")
+            play_sound("wrong")
         # move forward or finish
-        if self.q_index < len(self.questions)-1:
-            self.q_index += 1
+        if self.session.next():
+            self.log("nav", i=self.session.index)
             self.load_question()
         else:
             self.open_review()
 
+    def record_practice(self, correct):
+        # practice runs pick the next question from this outcome
+        if isinstance(self.questions, PracticeQuestions):
+            self.questions.record(self.session.index, correct)
+
+    def practice_store(self):
+        if self._practice is None:
+            self._practice = PracticeStore()
+        return self._practice
+
     def prev_pressed(self):
         self.stop_timer()
-        if self.q_index > 0:
-            self.q_index -= 1
+        if self.session.prev():
+            self.log("nav", i=self.session.index)
             self.load_question()
 
     # ---------- Review & Submit ----------
+    def summary_text(self, i):
+        q = self.questions[i]
+        return f"Q{i+1}. {one_line(q.get('question'))}\n   Your: {self.user_answers[i]}\n   Correct: {q.get('answer')}"
+
+    @timed("quiz_review_window_seconds")
     def open_review(self):
         # Stop timer
         self.stop_timer()
+        # a jump only hides the window, so coming back just refreshes the rows
+        if self.review_win is not None and self.review_win.winfo_exists():
+            self.review_list.set_count(asked_count(self.questions))
+            self.review_win.deiconify()
+            self.review_win.lift()
+            return
         # Review window where user can navigate and edit answers
         top = tk.Toplevel(self.master)
         top.title("Review Answers")
         top.geometry("760x480")
         ttk.Label(top, text="Review your answers. Click a question to jump and edit.", font=("Helvetica", 12, "bold")).pack(pady=8)
-        frame = ttk.Frame(top, padding=8)
-        frame.pack(fill="both", expand=True)
-        canvas = tk.Canvas(frame)
-        scrollbar = ttk.Scrollbar(frame, orient="vertical", command=canvas.yview)
-        scrollable = ttk.Frame(canvas)
-        scrollable.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
-        canvas.create_window((0,0), window=scrollable, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
-
-        # list question summaries
-        for i, q in enumerate(self.questions):
-            your = self.user_answers[i] if i < len(self.user_answers) else ""
-            text = f"Q{i+1}. {q.get('question')}\n   Your: {your}\n   Correct: {q.get('answer')}\n"
-            lbl = ttk.Label(scrollable, text=text, wraplength=700, justify="left")
-            lbl.pack(anchor="w", pady=6)
-            def make_jump(idx):
-                def jump(_=None):
-                    top.destroy()
-                    self.q_index = idx
-                    self.load_question()
-                return jump
-            lbl.bind("<Button-1>", make_jump(i))
+
+        def jump(idx):
+            top.withdraw()
+            self.session.jump(idx)
+            self.log("nav", i=self.session.index)
+            self.load_question()
+
+        def close():
+            self.review_win = self.review_list = None
+            top.destroy()
+
+        self.review_win = top
+        self.review_list = VirtualList(top, asked_count(self.questions), self.summary_text, on_click=jump, wraplength=700)
+        self.review_list.pack(fill="both", expand=True, padx=8, pady=8)
+        top.protocol("WM_DELETE_WINDOW", close)
 
         btn_frame = ttk.Frame(top, padding=8)
         btn_frame.pack(fill="x")
-        ttk.Button(btn_frame, text="Submit Quiz", command=lambda: [top.destroy(), self.submit_quiz()]).pack(side="right", padx=6)
-        ttk.Button(btn_frame, text="Close", command=top.destroy).pack(side="right")
+        ttk.Button(btn_frame, text="Submit Quiz", command=lambda: [close(), self.submit_quiz()]).pack(side="right", padx=6)
+        ttk.Button(btn_frame, text="Close", command=close).pack(side="right")
 
     def submit_quiz(self):
         # finalize answers, compute score and save to leaderboard
-        score = 0
-        total = len(self.questions)
-        for i, q in enumerate(self.questions):
-            ans = self.user_answers[i] if i < len(self.user_answers) else ""
-            if ans == q.get("answer"):
-                score += 1
-        pct = (score/total)*100 if total>0 else 0
+        score, total = self.session.submit()
+        self.log("end", score=score, total=total)
+        if isinstance(self.questions, PracticeQuestions):
+            try:
+                self.questions.finish(self.user_answers)
+            except Exception as e:
+                messagebox.showerror("Error", f"Could not save practice progress: {e}")
+        session_id, self.session_id = self.session_id, None
+        pct = score_pct(score, total)
         msg = f"Your Score: {score} / {total}  ({pct:.1f}%)"
         # ask for name
         name = simpledialog.askstring("Finished", f"{msg}\n\nEnter your name for leaderboard (or Cancel to skip):")
         if name:
             self.save_leaderboard(name, score, total)
+        self.save_results(session_id, name or self.player_name or "")
         # show detailed results
         self.show_result_window(score, total)
 
+    def save_results(self, session_id, player):
+        # append this quiz to the results dataset (export_result still writes a CSV on request)
+        if not RESULTS_DIR:
+            return
+        try:
+            if self._results is None:
+                self._results = ResultsWriter()
+            self._results.append(session_result_rows(self.session, session_id, player,
+                                                     self.category_name, getattr(self.questions, "seed", None)))
+            self._results.flush()
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not save results: {e}")
+
+    @timed("quiz_result_window_seconds")
     def show_result_window(self, score, total):
         pct = (score/total)*100 if total>0 else 0
         win = tk.Toplevel(self.master)
@@ -445,31 +3441,19 @@ class QuizApp:
         win.geometry("640x400")
         ttk.Label(win, text="Quiz Result", font=("Helvetica", 16, "bold")).pack(pady=10)
         ttk.Label(win, text=f"Score: {score} / {total} ({pct:.1f}%)", font=("Helvetica", 12)).pack(pady=6)
-        frame = ttk.Frame(win, padding=8)
-        frame.pack(fill="both", expand=True)
-        canvas = tk.Canvas(frame)
-        scrollbar = ttk.Scrollbar(frame, orient="vertical", command=canvas.yview)
-        scrollable = ttk.Frame(canvas)
-        scrollable.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
-        canvas.create_window((0,0), window=scrollable, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
-
-        for i, q in enumerate(self.questions):
-            your = self.user_answers[i] if i < len(self.user_answers) else "(no answer)"
-            correct = q.get("answer")
-            text = f"Q{i+1}. {q.get('question')}\n   Your: {your}\n   Correct: {correct}\n"
-            ttk.Label(scrollable, text=text, wraplength=580, justify="left").pack(anchor="w", pady=6)
+        VirtualList(win, asked_count(self.questions), self.summary_text, wraplength=580).pack(fill="both", expand=True, padx=8, pady=8)
 
         ttk.Button(win, text="Close", command=win.destroy).pack(pady=8)
 
     # ---------- Leaderboard ----------
+    def leaderboard(self):
+        if self._leaderboard is None:
+            self._leaderboard = open_leaderboard()
+        return self._leaderboard
+
     def save_leaderboard(self, name, score, total):
         try:
-            with open(LEADERBOARD_CSV, "a", newline="", encoding="utf-8") as f:
-                w = csv.writer(f)
-                w.writerow([name, score, total, datetime.now().isoformat()])
+            self.leaderboard().add(name, score, total, self.leaderboard_category)
             messagebox.showinfo("Saved", "Score saved to leaderboard.")
         except Exception as e:
             messagebox.showerror("Error", f"Could not save leaderboard: {e}")
@@ -477,31 +3461,50 @@ class QuizApp:
     def show_leaderboard(self):
         top = tk.Toplevel(self.master)
         top.title("Leaderboard")
-        top.geometry("420x420")
+        top.geometry("460x460")
         ttk.Label(top, text="Leaderboard (Top entries)", font=("Helvetica", 14, "bold")).pack(pady=8)
+        try:
+            store = self.leaderboard()
+            categories = store.categories()
+        except Exception as e:
+            ttk.Label(top, text=f"Error reading leaderboard: {e}").pack()
+            ttk.Button(top, text="Close", command=top.destroy).pack(pady=8)
+            return
+        # filters: category and/or player
+        filters = ttk.Frame(top, padding=(8,0))
+        filters.pack(fill="x")
+        cat_var = tk.StringVar(value="All categories")
+        ttk.Combobox(filters, textvariable=cat_var, state="readonly", width=18,
+                     values=["All categories"] + categories).pack(side="left")
+        player_var = tk.StringVar()
+        ttk.Entry(filters, textvariable=player_var, width=14).pack(side="left", padx=6)
         frame = ttk.Frame(top, padding=8)
         frame.pack(fill="both", expand=True)
-        # read leaderboard
-        rows = []
-        if os.path.isfile(LEADERBOARD_CSV):
+
+        def refresh(_=None):
+            for w in frame.winfo_children():
+                w.destroy()
+            player = player_var.get().strip()
+            category = cat_var.get() if cat_var.get() in categories else ""
             try:
-                with open(LEADERBOARD_CSV, "r", encoding="utf-8") as f:
-                    r = csv.reader(f)
-                    for row in r:
-                        if len(row) >= 4:
-                            name, score, total, ts = row[0], int(row[1]), int(row[2]), row[3]
-                            pct = (int(score)/int(total))*100 if int(total)>0 else 0
-                            rows.append((name, score, total, pct, ts))
-                # sort by score pct desc
-                rows.sort(key=lambda x: (x[3], x[1]), reverse=True)
+                if player and category:
+                    rows = store.for_player_in_category(player, category)
+                elif player:
+                    rows = store.for_player(player)
+                elif category:
+                    rows = store.top_for_category(category)
+                else:
+                    rows = store.top()
             except Exception as e:
                 ttk.Label(frame, text=f"Error reading leaderboard: {e}").pack()
-        if not rows:
-            ttk.Label(frame, text="No leaderboard entries yet.").pack()
-        else:
-            for i, r in enumerate(rows[:50]):
-                name, score, total, pct, ts = r
-                ttk.Label(frame, text=f"{i+1}. {name} — {score}/{total} ({pct:.1f}%) — {ts[:19]}").pack(anchor="w", pady=2)
+                return
+            if not rows:
+                ttk.Label(frame, text="No leaderboard entries yet.").pack()
+            for i, r in enumerate(rows):
+                ttk.Label(frame, text=f"{i+1}. {r.name} — {r.score}/{r.total} ({r.pct:.1f}%) — {r.ts[:19]}").pack(anchor="w", pady=2)
+
+        ttk.Button(filters, text="Show", command=refresh).pack(side="left")
+        refresh()
         ttk.Button(top, text="Close", command=top.destroy).pack(pady=8)
 
     # ---------- Export results ----------
@@ -512,13 +3515,7 @@ class QuizApp:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         fname = f"quiz_export_{timestamp}.csv"
         try:
-            with open(fname, "w", newline="", encoding="utf-8") as f:
-                w = csv.writer(f)
-                w.writerow(["Question", "Your Answer", "Correct Answer", "Correct?"])
-                for i, q in enumerate(self.questions):
-                    your = self.user_answers[i] if i < len(self.user_answers) else ""
-                    correct = q.get("answer")
-                    w.writerow([q.get("question"), your, correct, "YES" if your == correct else "NO"])
+            write_export(fname, self.questions, self.user_answers)
             messagebox.showinfo("Exported", f"Exported to {fname}")
         except Exception as e:
             messagebox.showerror("Error", f"Export failed: {e}")
@@ -527,13 +3524,58 @@ class QuizApp:
     def restart_quiz(self):
         if not messagebox.askyesno("Restart", "Restart the quiz (lose current progress)?"):
             return
+        self.log("abandon")
+        self.session_id = None
+        self.reload_bank_if_changed()
         self.open_category_selector()
 
 # ----------------- Run -----------------
-def main():
+def main(argv=None):
+    global STARTUP
+    parser = argparse.ArgumentParser(prog="quiz1111.py", description="Quiz App",
+                                     epilog="other commands: " + ", ".join(COMMANDS))
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="print an import-time and init-phase breakdown once the window is up")
+    parser.add_argument("--metrics", nargs="?", const=METRICS_PATH, default=metrics_from_env(), metavar="PATH",
+                        help=f"time the UI hot paths into PATH (default {METRICS_PATH}; .json for JSON); "
+                             "also QUIZ_METRICS=1 or QUIZ_METRICS=PATH")
+    args = parser.parse_args(argv)
+    if args.startup_profile:
+        STARTUP = StartupProfile()
+    if args.metrics:
+        enable_metrics(args.metrics)
     root = tk.Tk()
+    startup_mark("tk root")
     app = QuizApp(root)
     root.mainloop()
+    app.images.shutdown()
+    if app.watcher is not None:
+        app.watcher.stop()
+    if app._results is not None:
+        app._results.close()
+    if app.journal is not None:
+        app.journal.close()
+    if METRICS is not None:
+        METRICS.dump()
+
+def compile_main(argv=None):
+    parser = argparse.ArgumentParser(prog="quiz1111.py compile",
+                                     description="Compile questions.json into a binary question bank.")
+    parser.add_argument("json_path", nargs="?", default=QUESTIONS_JSON)
+    parser.add_argument("-o", "--output", help="output file (default: <json>.qzb)")
+    args = parser.parse_args(argv)
+    out = compile_question_bank(args.json_path, args.output)
+    bank = CompiledQuestionBank(out)
+    print(f"Compiled {len(bank)} categories, {bank.n_questions} questions, "
+          f"{bank.n_strings} distinct strings -> {out} ({os.path.getsize(out)} bytes)")
+    bank.close()
+
+COMMANDS = {
+    "compile": compile_main,
+}
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        COMMANDS[sys.argv[1]](sys.argv[2:])
+    else:
+        main(sys.argv[1:])
\ No newline at end of file
@@ -0,0 +1,230 @@
+# quiz_analytics.py
+# Batch scoring and item analysis over many answer sheets, vectorised with NumPy.
+#
+#   python quiz_analytics.py exports/ quiz_export_20251115_210956.csv [--json report.json]
+#   python quiz_analytics.py --dataset results [--player P] [--category C] [--since 2026-10-01]
+#   python quiz_analytics.py --dataset results --compact
+#
+# Input is what write_export (Export Result in the app) writes (Question, Your
+# Answer, Correct Answer, Correct?), one file per answer sheet, or a directory of
+# them, or the results dataset every finished quiz is appended to (one sheet per
+# session). Every question gets an option table built from the answers seen for
+# it, and the sheets become an int16 matrix of option indices:
+#   >= 0      the option chosen
+#   BLANK     shown but left unanswered
+#   NOT_SHOWN the question was not on this sheet
+# Scoring uses the same rule as QuizSession: the chosen text equals the answer.
+import argparse, csv, glob, json, os, sys
+
+from quiz1111 import EXPORT_HEADER, RESULTS_DIR, ResultsDataset
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+BLANK = -1
+NOT_SHOWN = -2
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("quiz_analytics needs NumPy (pip install numpy)")
+
+
+# ---------- Reading ----------
+def read_export(path):
+    # [(question, your answer, correct answer), ...] from one export file
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        rows = csv.reader(f)
+        header = next(rows, None)
+        if header is None or header[:3] != EXPORT_HEADER[:3]:
+            raise ValueError(f"{path}: not a quiz export")
+        return [(r[0], r[1], r[2]) for r in rows if len(r) >= 3]
+
+
+def export_paths(inputs):
+    # files as given, directories expanded to the exports inside them
+    for item in inputs:
+        if os.path.isdir(item):
+            yield from sorted(glob.glob(os.path.join(item, "*.csv")))
+        else:
+            yield item
+
+
+def load_exports(inputs):
+    names, sheets = [], []
+    for path in export_paths(inputs):
+        try:
+            sheets.append(read_export(path))
+        except (OSError, ValueError, UnicodeDecodeError) as e:
+            print(f"skipping {path}: {e}", file=sys.stderr)
+            continue
+        names.append(path)
+    return names, sheets
+
+
+def load_dataset(root=RESULTS_DIR, **filters):
+    # one sheet per session from the results dataset; filters as ResultsDataset.scan
+    sessions = {}
+    for r in ResultsDataset(root).scan(**filters):
+        s = sessions.get(r.session)
+        if s is None:
+            s = sessions[r.session] = (f"{r.player or 'anonymous'} {r.category} {r.ts} ({r.session})", {})
+        s[1][r.position] = (r.question, r.chosen, r.answer)
+    names = [name for name, _ in sessions.values()]
+    sheets = [[rows[i] for i in sorted(rows)] for _, rows in sessions.values()]
+    return names, sheets
+
+
+# ---------- Encoding ----------
+class AnswerKey:
+    def __init__(self):
+        self.questions = []       # question text per column
+        self.options = []         # option texts per question
+        self.correct = []         # option index of the answer per question
+        self._qidx = {}
+        self._oidx = []
+
+    def question(self, text, answer):
+        j = self._qidx.get(text)
+        if j is None:
+            j = self._qidx[text] = len(self.questions)
+            self.questions.append(text)
+            self.options.append([])
+            self._oidx.append({})
+            self.correct.append(self.option(j, answer))
+        return j
+
+    def option(self, j, text):
+        k = self._oidx[j].get(text)
+        if k is None:
+            k = self._oidx[j][text] = len(self.options[j])
+            self.options[j].append(text)
+        return k
+
+    def __len__(self):
+        return len(self.questions)
+
+
+def encode_sheets(sheets):
+    _require_numpy()
+    key = AnswerKey()
+    coded = []
+    for sheet in sheets:
+        row = {}
+        for question, your, correct in sheet:
+            j = key.question(question, correct)
+            row[j] = key.option(j, your) if your else BLANK
+        coded.append(row)
+    responses = np.full((len(coded), len(key)), NOT_SHOWN, dtype=np.int16)
+    for i, row in enumerate(coded):
+        if row:
+            responses[i, list(row.keys())] = list(row.values())
+    return key, responses
+
+
+# ---------- Scoring & analysis ----------
+def score_responses(responses, correct):
+    # (scores, totals) per sheet
+    shown = responses != NOT_SHOWN
+    right = responses == np.asarray(correct, dtype=np.int16)
+    return right.sum(axis=1), shown.sum(axis=1)
+
+
+def item_statistics(responses, correct):
+    shown = responses != NOT_SHOWN
+    right = (responses == np.asarray(correct, dtype=np.int16))
+    n_shown = shown.sum(axis=0)
+    n_right = right.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        p = n_right / n_shown
+        # corrected point-biserial: item vs. the rest of the sheet's score
+        scores = right.sum(axis=1, dtype=np.float64)
+        rest = np.where(shown, scores[:, None] - right, 0.0)
+        mean = rest.sum(axis=0) / n_shown
+        var = (rest * rest).sum(axis=0) / n_shown - mean * mean
+        mean_right = np.where(right, rest, 0.0).sum(axis=0) / n_right
+        r_pb = (mean_right - mean) / np.sqrt(var) * np.sqrt(p / (1 - p))
+    return {"shown": n_shown, "correct": n_right, "p_value": p,
+            "point_biserial": np.where(np.isfinite(r_pb), r_pb, np.nan)}
+
+
+def option_frequencies(responses, n_options):
+    # counts[j, k] = sheets choosing option k of question j (k < n_options[j])
+    width = max(max(n_options, default=0), 1)
+    cols = np.broadcast_to(np.arange(responses.shape[1]), responses.shape)
+    picked = responses >= 0
+    flat = cols[picked].astype(np.int64) * width + responses[picked]
+    return np.bincount(flat, minlength=responses.shape[1] * width).reshape(responses.shape[1], width)
+
+
+def analyse(sheets, names=None):
+    key, responses = encode_sheets(sheets)
+    scores, totals = score_responses(responses, key.correct)
+    items = item_statistics(responses, key.correct)
+    freq = option_frequencies(responses, [len(o) for o in key.options])
+    blanks = (responses == BLANK).sum(axis=0)
+    names = names or [f"sheet {i+1}" for i in range(len(sheets))]
+    report = {
+        "sheets": [{"sheet": n, "score": int(s), "total": int(t),
+                    "pct": float(s / t * 100) if t else 0.0}
+                   for n, s, t in zip(names, scores, totals)],
+        "items": [],
+    }
+    for j, question in enumerate(key.questions):
+        r = items["point_biserial"][j]
+        report["items"].append({
+            "question": question,
+            "answer": key.options[j][key.correct[j]],
+            "shown": int(items["shown"][j]),
+            "p_value": float(items["p_value"][j]) if items["shown"][j] else None,
+            "point_biserial": None if np.isnan(r) else float(r),
+            "blank": int(blanks[j]),
+            "options": {opt: int(freq[j, k]) for k, opt in enumerate(key.options[j])},
+        })
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score and analyse many quiz exports at once.")
+    parser.add_argument("inputs", nargs="*", help="export CSV files or directories of them")
+    parser.add_argument("--json", help="write the full report to this file")
+    parser.add_argument("--dataset", help="read the results dataset in this directory instead")
+    parser.add_argument("--player")
+    parser.add_argument("--category")
+    parser.add_argument("--since", help="first day to include (YYYY-MM-DD)")
+    parser.add_argument("--until", help="last day to include (YYYY-MM-DD)")
+    parser.add_argument("--compact", action="store_true",
+                        help="merge the dataset's small blocks (while nothing is writing to it) and exit")
+    args = parser.parse_args(argv)
+    if args.dataset and args.compact:
+        ResultsDataset(args.dataset).compact()
+        return
+    if not args.dataset and not args.inputs:
+        parser.error("give export files/directories or --dataset")
+    _require_numpy()
+    if args.dataset:
+        names, sheets = load_dataset(args.dataset, player=args.player, category=args.category,
+                                     since=args.since, until=args.until)
+    else:
+        names, sheets = load_exports(args.inputs)
+    if not sheets:
+        parser.error("no quiz exports found")
+    report = analyse(sheets, names)
+    pcts = [s["pct"] for s in report["sheets"]]
+    print(f"{len(sheets)} sheets, {len(report['items'])} questions, "
+          f"mean {sum(pcts)/len(pcts):.1f}%")
+    print(f"{'p':>6} {'r_pb':>6}  question")
+    for item in sorted(report["items"], key=lambda i: (i["p_value"] is None, i["p_value"])):
+        p = "-" if item["p_value"] is None else f"{item['p_value']:.2f}"
+        r = "-" if item["point_biserial"] is None else f"{item['point_biserial']:.2f}"
+        print(f"{p:>6} {r:>6}  {item['question'][:70]}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,398 @@
+# quiz_server.py
+# Multi-player mode: one asyncio process hosts many quiz sessions over a small
+# HTTP/1.1 + JSON API (keep-alive, stdlib only), plus a local load generator.
+#
+#   python quiz_server.py serve [--host 127.0.0.1] [--port 8765] [--bank questions.json]
+#   python quiz_server.py loadgen [--players 2000] [--concurrency 200] [--port 8765]
+#
+# API
+#   GET  /categories                          [{"id", "name", "count"}]
+#   POST /sessions      {"category", "shuffle", "count", "seed", "stratify"}
+#                                             new session + first question
+#   GET  /sessions/<id>                       current question
+#   POST /sessions/<id>/answer  {"option"}    {"correct": true|false|null}
+#   POST /sessions/<id>/next | /prev          move, returns the question
+#   POST /sessions/<id>/timeout {"option"}    record and move on
+#   POST /sessions/<id>/submit  {"name"}      score; queued for the leaderboard and results
+#   GET  /leaderboard?category=&k=            top entries
+#
+# The question bank is loaded once and each category is normalised once; every
+# session is a permutation view over those shared question objects. Leaderboard
+# rows and per-question results from all players are queued and written in
+# batches on a worker thread.
+import argparse, asyncio, json, random, secrets, time
+from urllib.parse import urlsplit, parse_qs
+
+from quiz1111 import (QUESTIONS_JSON, LEADERBOARD_DB, LEADERBOARD_CSV, LEADERBOARD_TOP, RESULTS_DIR,
+                      QUESTION_CACHE, QuizQuestions, QuizSession, ResultsWriter, load_questions_from_json,
+                      open_leaderboard, score_pct, session_result_rows)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+SESSION_TTL = 30 * 60          # idle sessions are dropped after this many seconds
+LEADERBOARD_BATCH = 500        # rows per leaderboard write
+LEADERBOARD_FLUSH_EVERY = 0.5  # seconds between leaderboard writes
+MAX_BODY = 64 * 1024
+
+_REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+            405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class SharedBank:
+    # one in-memory copy of the normalised categories for every session
+    def __init__(self, path):
+        self.bank = load_questions_from_json(path)
+        self.names = self.bank.names()
+        self._categories = {}
+
+    def listing(self):
+        return [{"id": i, "name": name, "count": e.count}
+                for i, (name, e) in enumerate(zip(self.names, self.bank.entries))]
+
+    def questions(self, idx):
+        qs = self._categories.get(idx)
+        if qs is None:
+            qs = self._categories[idx] = QUESTION_CACHE.get(self.bank, idx)
+        return qs
+
+
+class LiveSession:
+    __slots__ = ("quiz", "category", "last_seen")
+
+    def __init__(self, quiz, category):
+        self.quiz = quiz
+        self.category = category
+        self.last_seen = time.monotonic()
+
+
+class QuizServer:
+    def __init__(self, bank_path=QUESTIONS_JSON, db_path=LEADERBOARD_DB, csv_path=LEADERBOARD_CSV,
+                 results_dir=RESULTS_DIR):
+        self.bank = SharedBank(bank_path)
+        self.leaderboard = open_leaderboard(db_path, csv_path)
+        self.results = ResultsWriter(results_dir) if results_dir else None
+        self.sessions = {}
+        self.requests = 0
+        self._pending_scores = []
+        self._pending_results = []
+        self._server = None
+        self._tasks = []
+
+    # ---------- lifecycle ----------
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self._server = await asyncio.start_server(self._handle_client, host, port, backlog=1024)
+        self._tasks = [asyncio.create_task(self._flush_loop()), asyncio.create_task(self._reap_loop())]
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def stop(self):
+        for t in self._tasks:
+            t.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        await self._flush()
+        self.leaderboard.close()
+        if self.results is not None:
+            self.results.close()
+
+    async def _flush(self):
+        while self._pending_scores:
+            batch = self._pending_scores[:LEADERBOARD_BATCH]
+            del self._pending_scores[:LEADERBOARD_BATCH]
+            await asyncio.get_running_loop().run_in_executor(None, self.leaderboard.add_many, batch)
+        if self._pending_results:
+            rows, self._pending_results = self._pending_results, []
+            await asyncio.get_running_loop().run_in_executor(None, self._write_results, rows)
+
+    def _write_results(self, rows):
+        self.results.append(rows)
+        self.results.flush()
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(LEADERBOARD_FLUSH_EVERY)
+            await self._flush()
+
+    async def _reap_loop(self):
+        while True:
+            await asyncio.sleep(60)
+            cutoff = time.monotonic() - SESSION_TTL
+            for sid in [sid for sid, s in self.sessions.items() if s.last_seen < cutoff]:
+                del self.sessions[sid]
+
+    # ---------- HTTP ----------
+    async def _handle_client(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        k, v = line.split(":", 1)
+                        headers[k.strip().lower()] = v.strip()
+                try:
+                    length = int(headers.get("content-length", "0") or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    status, payload = 400, {"error": "bad Content-Length"}
+                elif length > MAX_BODY:
+                    status, payload = 413, {"error": "body too large"}
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload = self.dispatch(method, target, body)
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                data = json.dumps(payload, separators=(",", ":")).encode()
+                writer.write(f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                             f"Content-Type: application/json\r\n"
+                             f"Content-Length: {len(data)}\r\n"
+                             f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data)
+                await writer.drain()
+                if not keep_alive or not 0 <= length <= MAX_BODY:
+                    break   # the unread body leaves the stream out of step
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def dispatch(self, method, target, body):
+        self.requests += 1
+        url = urlsplit(target)
+        parts = [p for p in url.path.split("/") if p]
+        try:
+            data = json.loads(body) if body else {}
+            if not isinstance(data, dict):
+                raise HttpError(400, "JSON object expected")
+            if parts == ["categories"] and method == "GET":
+                return 200, self.bank.listing()
+            if parts == ["leaderboard"] and method == "GET":
+                return 200, self.leaderboard_view(parse_qs(url.query))
+            if parts == ["sessions"] and method == "POST":
+                return 201, self.create_session(data)
+            if len(parts) in (2, 3) and parts[0] == "sessions":
+                live = self.sessions.get(parts[1])
+                if live is None:
+                    raise HttpError(404, "no such session")
+                live.last_seen = time.monotonic()
+                action = parts[2] if len(parts) == 3 else ""
+                if method != ("GET" if not action else "POST"):
+                    raise HttpError(405, "method not allowed")
+                return 200, self.session_action(parts[1], live, action, data)
+            raise HttpError(404, "not found")
+        except HttpError as e:
+            return e.status, {"error": str(e)}
+        except (ValueError, TypeError, KeyError) as e:
+            return 400, {"error": str(e)}
+        except Exception as e:
+            return 500, {"error": str(e)}
+
+    # ---------- quiz API ----------
+    def question_view(self, quiz):
+        q = quiz.current()
+        return {"index": quiz.index, "total": len(quiz), "question": q.get("question", ""),
+                "options": q.get("options", []), "image": q.get("image", ""),
+                "answer": quiz.answers[quiz.index]}
+
+    def create_session(self, data):
+        idx = int(data.get("category", 0))
+        if not 0 <= idx < len(self.bank.names):
+            raise HttpError(404, "no such category")
+        questions = self.bank.questions(idx)
+        if not questions:
+            raise HttpError(400, "category has no questions")
+        stratify = data.get("stratify") or None
+        if stratify not in (None, "tag", "difficulty"):
+            raise HttpError(400, "stratify must be 'tag' or 'difficulty'")
+        seed = data.get("seed")
+        # an index view over the shared question objects
+        view = QuizQuestions.sample(questions, int(data.get("count", 0)),
+                                    None if seed is None else int(seed),
+                                    bool(data.get("shuffle", True)), stratify)
+        sid = secrets.token_urlsafe(12)
+        quiz = QuizSession(view)
+        self.sessions[sid] = LiveSession(quiz, self.bank.names[idx])
+        return {"session": sid, "category": self.bank.names[idx], "seed": view.seed,
+                **self.question_view(quiz)}
+
+    def session_action(self, sid, live, action, data):
+        quiz = live.quiz
+        if action == "":
+            return self.question_view(quiz)
+        if action == "answer":
+            return {"correct": quiz.answer(str(data.get("option", "")))}
+        if action in ("next", "prev"):
+            moved = quiz.next() if action == "next" else quiz.prev()
+            return {"moved": moved, **self.question_view(quiz)}
+        if action == "timeout":
+            moved = quiz.timeout(str(data.get("option", "")))
+            return {"moved": moved, **self.question_view(quiz)}
+        if action == "submit":
+            score, total = quiz.submit()
+            name = str(data.get("name", "")).strip()
+            if name:
+                self._pending_scores.append((name, score, total, live.category, None))
+            if self.results is not None:
+                self._pending_results.extend(session_result_rows(quiz, sid, name, live.category,
+                                                                 quiz.questions.seed))
+            del self.sessions[sid]
+            return {"score": score, "total": total, "pct": score_pct(score, total)}
+        raise HttpError(404, f"unknown action {action!r}")
+
+    def leaderboard_view(self, query):
+        k = min(int(query.get("k", [LEADERBOARD_TOP])[0]), 1000)
+        category = query.get("category", [""])[0]
+        rows = self.leaderboard.top_for_category(category, k) if category else self.leaderboard.top(k)
+        return [r._asdict() for r in rows]
+
+
+# ----------------- Load generator -----------------
+class HttpClient:
+    # minimal keep-alive JSON client for the load generator
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def request(self, method, path, payload=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        body = json.dumps(payload).encode() if payload is not None else b""
+        self.writer.write(f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                          f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        status = int(lines[0].split(" ")[1])
+        length = 0
+        for line in lines[1:]:
+            if line.lower().startswith("content-length:"):
+                length = int(line.split(":", 1)[1])
+        data = json.loads(await self.reader.readexactly(length)) if length else None
+        if status >= 400:
+            raise RuntimeError(f"{method} {path} -> {status}: {data}")
+        return data
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+async def run_loadgen(host, port, players, concurrency, seed=0):
+    rng = random.Random(seed)
+    client = HttpClient(host, port)
+    categories = [c for c in await client.request("GET", "/categories") if c["count"]]
+    await client.close()
+    if not categories:
+        raise RuntimeError("server has no non-empty categories")
+    latencies = []
+    done = 0
+    queue = asyncio.Queue()
+    for i in range(players):
+        queue.put_nowait(i)
+
+    async def timed(client, method, path, payload=None):
+        t0 = time.perf_counter()
+        r = await client.request(method, path, payload)
+        latencies.append(time.perf_counter() - t0)
+        return r
+
+    async def worker():
+        nonlocal done
+        client = HttpClient(host, port)
+        try:
+            while True:
+                try:
+                    player = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                cat = rng.choice(categories)
+                s = await timed(client, "POST", "/sessions", {"category": cat["id"]})
+                base = f"/sessions/{s['session']}"
+                while True:
+                    await timed(client, "POST", base + "/answer", {"option": rng.choice(s["options"])})
+                    s = await timed(client, "POST", base + "/next")
+                    if not s["moved"]:
+                        break
+                await timed(client, "POST", base + "/submit", {"name": f"bot{player}"})
+                done += 1
+        finally:
+            await client.close()
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, players))))
+    elapsed = time.perf_counter() - t0
+    latencies.sort()
+    pick = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+    return {"players": done, "requests": len(latencies), "seconds": elapsed,
+            "requests_per_sec": len(latencies) / elapsed,
+            "p50_ms": pick(0.50), "p99_ms": pick(0.99), "max_ms": latencies[-1] * 1000}
+
+
+# ----------------- CLI -----------------
+async def _serve(args):
+    server = QuizServer(args.bank, args.db, results_dir=args.results)
+    host, port = await server.start(args.host, args.port)
+    print(f"Quiz server on http://{host}:{port} ({len(server.bank.names)} categories)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+async def _loadgen(args):
+    server = None
+    host, port = args.host, args.port
+    if port is None:
+        # no target given: host a server in this process on a free port
+        server = QuizServer(args.bank, args.db, csv_path=None, results_dir=args.results)
+        host, port = await server.start(args.host, 0)
+    try:
+        r = await run_loadgen(host, port, args.players, args.concurrency, args.seed)
+    finally:
+        if server is not None:
+            await server.stop()
+    print(f"{r['players']} players, {r['requests']} requests in {r['seconds']:.2f}s "
+          f"-> {r['requests_per_sec']:,.0f} req/s, p50 {r['p50_ms']:.2f}ms, "
+          f"p99 {r['p99_ms']:.2f}ms, max {r['max_ms']:.2f}ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-player quiz server")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("serve", help="host quiz sessions over HTTP")
+    p.add_argument("--host", default=DEFAULT_HOST)
+    p.add_argument("--port", type=int, default=DEFAULT_PORT)
+    p.add_argument("--bank", default=QUESTIONS_JSON)
+    p.add_argument("--db", default=LEADERBOARD_DB)
+    p.add_argument("--results", default=RESULTS_DIR, help="results dataset directory ('' to disable)")
+    p = sub.add_parser("loadgen", help="simulate many concurrent players")
+    p.add_argument("--host", default=DEFAULT_HOST)
+    p.add_argument("--port", type=int, help="server to target (default: start one in-process)")
+    p.add_argument("--players", type=int, default=2000)
+    p.add_argument("--concurrency", type=int, default=200)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--bank", default=QUESTIONS_JSON)
+    p.add_argument("--db", default=":memory:",
+                   help="leaderboard for the in-process server (default: in memory, so bots never reach the real one)")
+    p.add_argument("--results", default="", help="results dataset for the in-process server (default: none)")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_serve(args) if args.cmd == "serve" else _loadgen(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
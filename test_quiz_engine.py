@@ -0,0 +1,246 @@
+# test_quiz_engine.py
+# Regression tests for the headless quiz engine: python -m pytest -q
+import json, os, random, wave
+
+import pytest
+
+import quiz1111
+from quiz1111 import (CompiledQuestionBank, JsonQuestionBank, PracticeQuestions, PracticeScheduler,
+                      PracticeStore, Question, QuestionSet, QuizQuestions, QuizSession, ResultRow,
+                      ResultsDataset, ResultsWriter, SearchIndex, SoundBank, StringTable,
+                      compact_journal, compile_question_bank, decode_result_block, encode_result_block,
+                      parse_query, question_key, read_journal, session_result_rows)
+
+
+def make_set(raw):
+    return QuestionSet((Question.from_raw(q) for q in raw), StringTable())
+
+
+def test_answer_beyond_fourth_option_is_kept():
+    qs = make_set([{"question": "Pick F", "options": ["a", "b", "c", "d", "F"], "answer": "F"}])
+    assert qs[0].answer == "F"
+    assert qs[0].options == ("a", "b", "c", "d")
+    session = QuizSession(QuizQuestions.sample(qs, shuffle=True))
+    assert session.questions[0]["answer"] == "F"
+    assert session.submit() == (0, 1)   # a blank sheet doesn't score
+
+
+def test_practice_submitted_early_only_counts_what_was_asked(tmp_path):
+    qs = make_set([{"question": f"Q{i}", "options": ["a", "b", "c", "d"], "answer": "a"}
+                   for i in range(50)])
+    store = PracticeStore(str(tmp_path / "practice.db"))
+    scheduler = PracticeScheduler(qs, store, "p", rng=random.Random(1))
+    view = PracticeQuestions(scheduler, 20)
+    session = QuizSession(view)
+    for _ in range(2):
+        view.record(session.index, bool(session.answer(session.current()["answer"])))
+        session.next()
+    session.current()   # third question shown, then Submit without answering
+    assert list(view) == view[:] and len(list(view)) == 3
+    assert session.submit() == (2, 3)
+    assert len(session_result_rows(session, "s")) == 3
+    assert view.asked == 3
+    view.finish(session.answers)
+    store.close()
+    store = PracticeStore(str(tmp_path / "practice.db"))
+    assert len(store.reviews("p", [question_key(q) for q in qs])) == 3
+    store.close()
+
+
+# ---------- Sounds ----------
+def write_wav(path, frames=400):
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(22050)
+        w.writeframes(b"\0\0" * frames)
+    return str(path)
+
+
+@pytest.fixture
+def dummy_mixer(monkeypatch):
+    pygame = pytest.importorskip("pygame")
+    monkeypatch.setenv("SDL_AUDIODRIVER", "dummy")
+    yield pygame
+    pygame.mixer.quit()
+
+
+def test_sound_bank_preloads_and_rotates_channels(dummy_mixer, tmp_path):
+    bank = SoundBank({"correct": write_wav(tmp_path / "correct.wav"), "wrong": str(tmp_path / "wrong.wav")},
+                     channels=3)
+    bank.preload()
+    assert bank.available and len(bank._channels) == 3
+    assert bank._buffers["correct"] is not None
+    # a missing file is remembered, not looked for again on every answer
+    assert bank._buffers["wrong"] is None
+    write_wav(tmp_path / "wrong.wav")
+    bank.play("wrong")
+    assert bank._buffers["wrong"] is None
+    turns = []
+    for _ in range(4):
+        bank.play("correct")
+        turns.append(bank._next)
+    assert turns == [1, 2, 0, 1]
+
+
+def test_sound_bank_without_mixer_is_silent(monkeypatch, tmp_path):
+    monkeypatch.setattr(quiz1111, "load_pygame", lambda: False)
+    bank = SoundBank({"correct": write_wav(tmp_path / "correct.wav")})
+    bank.preload()
+    assert bank.available is False
+    bank.play("correct")   # no mixer: nothing happens, nothing raises
+    assert bank._buffers == {} and bank._next == 0
+
+
+# ---------- Question bank formats ----------
+BANK = [
+    {"category": "Say \"hi\"", "questions": [
+        {"question": "Escaped \"quotes\" and \\ backslash?", "options": ["a \"1\"", "b", "c", "d"],
+         "answer": "a \"1\"", "image": "", "tag": "x", "difficulty": "easy"},
+        {"question": "Unicode é ✓", "options": ["yes", "no"], "answer": "yes", "extra": {"n": [1, 2]}},
+    ]},
+    {"category": "Empty", "questions": []},
+    {"category": "Loops", "questions": [
+        {"question": f"Loop {i}?", "options": ["for", "while", "until", "goto"], "answer": "for"}
+        for i in range(5)]},
+]
+
+
+def write_bank(path, categories):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(categories, f, ensure_ascii=False, indent=1)
+    return str(path)
+
+
+def test_compiled_bank_round_trips_json(tmp_path):
+    path = write_bank(tmp_path / "questions.json", BANK)
+    src = JsonQuestionBank(path)
+    compiled = CompiledQuestionBank(compile_question_bank(path))
+    try:
+        assert compiled.names() == src.names() == ['Say "hi"', "Empty", "Loops"]
+        for i in range(len(src)):
+            raw = src.load_category(i)
+            # a missing image is stored as ""
+            raw["questions"] = [{"image": "", **q} for q in raw["questions"]]
+            assert compiled.load_category(i) == raw
+            assert compiled.category_digest(i) == src.category_digest(i)
+    finally:
+        compiled.close()
+
+
+def test_reindex_matches_a_full_index(tmp_path):
+    path = tmp_path / "questions.json"
+    before = JsonQuestionBank(write_bank(path, BANK))
+    edits = [
+        lambda b: b[0]["questions"][0].update(question="edited"),     # grows the first category
+        lambda b: b[2]["questions"].pop(),                            # shrinks the last
+        lambda b: b.insert(1, {"category": "New", "questions": []}),  # adds one in the middle
+        lambda b: b.pop(0),                                           # removes the first
+    ]
+    for edit in edits:
+        bank = json.loads(path.read_text(encoding="utf-8"))
+        edit(bank)
+        write_bank(path, bank)
+        after = JsonQuestionBank.reindex(str(path), before)
+        full = JsonQuestionBank(str(path))
+        assert after.entries == full.entries
+        assert after.digests == full.digests
+        before = after
+
+
+# ---------- Search ----------
+def test_parse_query():
+    assert parse_query("binary AND number") == ("and", [("term", "binary", False), ("term", "number", False)])
+    assert parse_query("a b OR c") == ("or", [("and", [("term", "a", False), ("term", "b", False)]),
+                                              ("term", "c", False)])
+    assert parse_query("(loop OR iter*) NOT java") == (
+        "and", [("or", [("term", "loop", False), ("term", "iter", True)]), ("not", ("term", "java", False))])
+    for bad in ("", "AND", "a OR", "NOT", "a )"):
+        with pytest.raises(ValueError):
+            parse_query(bad)
+
+
+def test_search_index_save_load_and_removed_category(tmp_path):
+    path = tmp_path / "questions.json"
+    bank = JsonQuestionBank(write_bank(path, BANK))
+    index = SearchIndex()
+    assert index.sync(bank) == (3, 0)
+    hits = index.search("loop")
+    assert sorted(n for c, n, _ in hits) == [0, 1, 2, 3, 4] and {c for c, _, _ in hits} == {2}
+    index.save(str(tmp_path / "questions.qzi"))
+    loaded = SearchIndex.load(str(tmp_path / "questions.qzi"))
+    assert loaded.sync(bank) == (0, 0)
+    assert loaded.search("loop") == hits
+    assert loaded.search('quotes AND "1"') == index.search('quotes AND "1"') != []
+    # drop the Loops category: its questions no longer match
+    bank = JsonQuestionBank(write_bank(path, BANK[:2]))
+    assert loaded.sync(bank) == (0, 1)
+    assert loaded.search("loop") == []
+    assert [c for c, _, _ in loaded.search("unicode")] == [0]
+
+
+# ---------- Results dataset ----------
+def result_rows(session, player, n, ts="2026-10-01T10:00:00"):
+    return [ResultRow(session, player, "Loops", "7", ts, i, f"Loop {i}?", "for" if i % 2 else "goto",
+                      "for", bool(i % 2)) for i in range(n)]
+
+
+def test_result_block_round_trip():
+    rows = result_rows("s1", "alice", 5) + result_rows("s2", "bob", 3)
+    block = encode_result_block(rows)
+    magic, n_rows, n_strings, bloom_len, payload_len, crc = quiz1111._RESULTS_BLOCK.unpack_from(block)
+    payload = block[quiz1111._RESULTS_BLOCK.size + bloom_len:]
+    strings, cols = decode_result_block(n_rows, n_strings, payload)
+    assert list(quiz1111._result_rows(strings, cols)) == rows
+
+
+def test_results_dataset_scan_compact_and_torn_tail(tmp_path):
+    root = str(tmp_path / "results")
+    for session, player, ts in (("s1", "alice", "2026-10-01T09:00:00"), ("s2", "bob", "2026-10-01T10:00:00"),
+                                ("s3", "alice", "2026-10-02T11:00:00")):
+        writer = ResultsWriter(root, block_rows=4)
+        writer.append(result_rows(session, player, 5, ts))
+        writer.close()
+    data = ResultsDataset(root)
+    assert data.partitions() == ["2026-10-01", "2026-10-02"]
+    assert len(list(data.scan())) == 15
+    assert {r.session for r in data.scan(player="alice")} == {"s1", "s3"}
+    assert [r.position for r in data.scan(player="alice", since="2026-10-02")] == [0, 1, 2, 3, 4]
+    assert list(data.scan(player="carol")) == []
+    data.compact(block_rows=4)
+    assert len(list(data.files("2026-10-01", "2026-10-01"))) == 1
+    written = (result_rows("s1", "alice", 5, "2026-10-01T09:00:00")
+               + result_rows("s2", "bob", 5, "2026-10-01T10:00:00")
+               + result_rows("s3", "alice", 5, "2026-10-02T11:00:00"))
+    assert sorted(data.scan()) == sorted(written)
+    # a crash mid-write leaves half a block at the end of a part
+    path = next(data.files("2026-10-02", "2026-10-02"))
+    with open(path, "ab") as f:
+        f.write(encode_result_block(result_rows("s4", "dave", 3, "2026-10-02T12:00:00"))[:-5])
+    assert {r.session for r in data.scan(since="2026-10-02")} == {"s3"}
+
+
+# ---------- Session journal ----------
+def test_journal_skips_torn_line_and_compacts(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    records = [
+        {"t": "start", "s": "a", "category": "Loops", "seed": 1, "k": 3},
+        {"t": "answer", "s": "a", "i": 0, "option": "for"},
+        {"t": "start", "s": "b", "category": "Loops", "seed": 2, "k": 3},
+        {"t": "nav", "s": "a", "i": 1},
+        {"t": "answer", "s": "a", "i": 0, "option": "while"},
+        {"t": "end", "s": "b", "score": 0, "total": 3},
+    ]
+    with open(path, "w", encoding="utf-8") as f:
+        for rec in records:
+            f.write(json.dumps(rec) + "\n")
+        f.write('{"t": "answer", "s": "a", "i": 1, "opt')   # torn by a crash
+    sessions = read_journal(path)
+    assert list(sessions) == ["a", "b"] and sessions["b"].ended
+    a = sessions["a"]
+    assert not a.ended and a.answers == {0: "while"} and a.index == 0
+    assert compact_journal(path) == 1
+    kept = read_journal(path)
+    assert list(kept) == ["a"]
+    assert kept["a"].start == records[0] and kept["a"].answers == {0: "while"} and kept["a"].index == 0
+    assert not os.path.exists(path + ".tmp")